@@ -0,0 +1,173 @@
+"""
+In-process voter aggregates
+Running demographic counts updated as voters are stored, periodically reconciled against the database
+"""
+
+import os
+import re
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import database as db
+
+# How often the running counts are rebuilt from the voters table
+AGGREGATES_RECONCILE_INTERVAL_SECONDS = float(os.getenv("AGGREGATES_RECONCILE_INTERVAL_SECONDS", "900"))
+
+# Upper bounds (inclusive) of the age bands; anything older falls in the last band
+AGE_BANDS = [(25, "18-25"), (35, "26-35"), (45, "36-45"), (60, "46-60")]
+OLDEST_AGE_BAND = "60+"
+
+DISABILITY_FLAGS = [
+    "disability_any",
+    "is_locomotor_disabled",
+    "is_speech_hearing_disabled",
+    "is_visually_impaired",
+    "is_wheelchair_required",
+    "pwd"
+]
+
+
+def age_band(age: Any) -> str:
+    """Bucket an age value into one of AGE_BANDS"""
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return "unknown"
+
+    for upper, label in AGE_BANDS:
+        if age <= upper:
+            return label
+    return OLDEST_AGE_BAND
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a PostgREST timestamptz (Python 3.9's fromisoformat needs exactly 6 fractional digits)"""
+    match = re.fullmatch(r"(.+?)(?:\.(\d+))?(Z|[+-]\d{2}:?\d{2})?", value.strip().replace(" ", "T"))
+    base, fraction, offset = match.groups()
+    fraction = ((fraction or "") + "000000")[:6]
+    offset = "+00:00" if offset in (None, "Z") else offset[:3] + ":" + offset[-2:]
+    return datetime.fromisoformat(f"{base}.{fraction}{offset}")
+
+
+def is_flag_set(value: Any) -> bool:
+    """ECI flags arrive as booleans, Y/N strings or 0/1"""
+    if isinstance(value, str):
+        return value.strip().upper() in ("Y", "YES", "TRUE", "1")
+    return bool(value)
+
+
+class AggregateCounts:
+    """Counts by gender, age band, part number, AC number and disability flag"""
+
+    def __init__(self):
+        self.total = 0
+        self.by_gender: Counter = Counter()
+        self.by_age_band: Counter = Counter()
+        self.by_part_number: Counter = Counter()
+        self.by_ac_number: Counter = Counter()
+        self.by_disability: Counter = Counter()
+
+    def add(self, voter: Dict[str, Any]):
+        self.total += 1
+        self.by_gender[voter.get("gender") or "unknown"] += 1
+        self.by_age_band[age_band(voter.get("age"))] += 1
+        self.by_part_number[str(voter.get("part_number") or "unknown")] += 1
+        self.by_ac_number[str(voter.get("ac_number") or "unknown")] += 1
+        for flag in DISABILITY_FLAGS:
+            if is_flag_set(voter.get(flag)):
+                self.by_disability[flag] += 1
+
+    def add_count(self, dimension: str, bucket: Optional[str], count: int):
+        """Load one (dimension, bucket, count) row from the voter_aggregate_counts function"""
+        if dimension == "total":
+            self.total = count
+            return
+        counters = {
+            "gender": self.by_gender,
+            "age_band": self.by_age_band,
+            "part_number": self.by_part_number,
+            "ac_number": self.by_ac_number,
+            "disability": self.by_disability
+        }
+        counters[dimension][bucket] = count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_voters": self.total,
+            "by_gender": dict(self.by_gender),
+            "by_age_band": dict(self.by_age_band),
+            "by_part_number": dict(self.by_part_number),
+            "by_ac_number": dict(self.by_ac_number),
+            "by_disability": dict(self.by_disability)
+        }
+
+
+class VoterAggregates:
+    """
+    Running aggregates over the voters table
+
+    add() is called for every newly stored voter, so reads cost O(1)
+    regardless of table size. reconcile() rebuilds the counts from the
+    database to correct drift (restarts, rows written by other workers).
+    """
+
+    def __init__(self):
+        self.counts = AggregateCounts()
+        self.last_reconciled_at: Optional[datetime] = None
+        self.updated_at: Optional[datetime] = None
+        # Rows stored while a reconciliation query is running
+        self._pending: Optional[List[Dict[str, Any]]] = None
+
+    def add(self, voter: Dict[str, Any]):
+        """Count a newly inserted voter"""
+        self.counts.add(voter)
+        self.updated_at = datetime.now()
+        if self._pending is not None:
+            self._pending.append(voter)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counts plus freshness information"""
+        snapshot = self.counts.to_dict()
+        snapshot["reconciled"] = self.last_reconciled_at is not None
+        snapshot["last_reconciled_at"] = self.last_reconciled_at.isoformat() if self.last_reconciled_at else None
+        snapshot["updated_at"] = self.updated_at.isoformat() if self.updated_at else None
+        return snapshot
+
+    async def reconcile(self):
+        """Rebuild the counts with one grouped query (voter_aggregate_counts, migrations/009)"""
+        if self._pending is not None:
+            # A reconciliation is already running
+            return
+
+        self._pending = []
+        try:
+            result = await db.run(lambda c: c.rpc("voter_aggregate_counts", {}))
+            rows = result.data or []
+
+            rebuilt = AggregateCounts()
+            for row in rows:
+                rebuilt.add_count(row["dimension"], row["bucket"], row["count"])
+
+            # Rows stored during the query that its snapshot did not include
+            counted_at = parse_timestamp(rows[0]["counted_at"]) if rows else None
+            for voter in self._pending:
+                created_at = voter.get("created_at")
+                if counted_at is None or not created_at or parse_timestamp(created_at) > counted_at:
+                    rebuilt.add(voter)
+
+            self.counts = rebuilt
+            self.last_reconciled_at = datetime.now()
+            self.updated_at = self.last_reconciled_at
+        finally:
+            self._pending = None
+
+    async def reconcile_periodically(self, interval: float = AGGREGATES_RECONCILE_INTERVAL_SECONDS):
+        """Background loop: reconcile now, then every interval seconds"""
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"Voter aggregate reconciliation failed: {str(e)}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,236 @@
+"""
+In-process caches
+Bounded LRU cache with per-entry TTL, approximate memory accounting and hit/miss counters
+"""
+
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory held by a JSON-like value (its serialized length in bytes)"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after ttl_seconds
+
+    Entries are evicted oldest-first once either max_entries or max_bytes
+    (as measured by estimate_size) is exceeded.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, accept: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """
+        Return the cached value, or None if missing or expired
+
+        If accept is given, a cached value it rejects is counted as a miss
+        (the entry is kept).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            if accept is not None and not accept(value):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value without touching counters or recency"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least-recently-used entries if over budget"""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, size)
+            self.current_bytes += size
+
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+class StaleWhileRevalidateCache:
+    """
+    Caches the result of one async loader with stale-while-revalidate semantics
+
+    Within ttl_seconds the cached value is returned as is. Up to
+    max_stale_seconds it is still returned immediately while a background
+    refresh runs. After that, or after invalidate(), callers wait for a fresh
+    load. Concurrent refreshes are coalesced into a single loader call.
+    A refresh that was already running when invalidate() was called is not
+    reused and its result is discarded; callers waiting on it wait for the
+    newer load instead.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], ttl_seconds: float, max_stale_seconds: float):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max(max_stale_seconds, ttl_seconds)
+        self.value: Any = None
+        self.computed_at: Optional[datetime] = None
+        self.refreshes = 0
+        self._loaded_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Bumped by invalidate(); a refresh only stores its value if no invalidation happened meanwhile
+        self._generation = 0
+        self._refresh_generation = 0
+
+    async def get(self) -> Tuple[Any, datetime]:
+        """Return (value, time it was computed), loading or refreshing as needed"""
+        age = time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+
+        if age is None or age >= self.max_stale_seconds:
+            await asyncio.shield(self._start_refresh())
+            while self._loaded_at is None:
+                # invalidate() ran while we waited; the refresh was discarded, wait for the current one
+                await asyncio.shield(self._start_refresh())
+        elif age >= self.ttl_seconds:
+            self._start_refresh()
+
+        return self.value, self.computed_at
+
+    def invalidate(self):
+        """Force the next get() to wait for a fresh load"""
+        self._loaded_at = None
+        self._generation += 1
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done() or self._refresh_generation != self._generation:
+            self._refresh_generation = self._generation
+            self._refresh_task = asyncio.create_task(self._refresh(self._generation))
+            self._refresh_task.add_done_callback(self._log_failure)
+        return self._refresh_task
+
+    async def _refresh(self, generation: int):
+        value = await self.loader()
+        if generation != self._generation:
+            # Loaded before the latest invalidate(); a newer refresh supplies the value
+            return
+        self.value = value
+        self.computed_at = datetime.now()
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Cache refresh failed: {str(task.exception())}")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of repeating it. Nothing is
+    kept once the task finishes. A cancelled caller does not cancel the
+    shared work.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, whether this call joined one already in flight)"""
+        self.calls += 1
+        task = self._in_flight.get(key)
+        shared = task is not None
+
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> Dict[str, Any]:
+        """Call and coalescing counters for monitoring"""
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced
+        }
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
@@ -0,0 +1,98 @@
+"""
+Database access layer
+Runs supabase-py queries on a bounded thread pool so async handlers never block the event loop
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+from metrics import SUPABASE_CALLS, SUPABASE_CALL_SECONDS
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Load .env.local for local development (Railway will use environment variables directly)
+load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env.local'))
+
+# Check multiple env var formats
+SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+
+if not SUPABASE_URL or not SUPABASE_KEY:
+    print("Environment variables:")
+    print(f"SUPABASE_URL: {os.getenv('SUPABASE_URL')}")
+    print(f"NEXT_PUBLIC_SUPABASE_URL: {os.getenv('NEXT_PUBLIC_SUPABASE_URL')}")
+    raise ValueError("Supabase credentials not found in environment variables. Please set SUPABASE_URL and SUPABASE_KEY")
+
+# Upper bound on concurrent in-flight queries (one pooled Supabase client per worker thread)
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="db")
+_local = threading.local()
+
+
+def get_client() -> "Client":
+    """
+    Return the Supabase client owned by the calling thread
+
+    Each pool thread keeps its own client, and with it its own keep-alive
+    HTTP connection pool, so queries never share a connection across threads.
+    """
+    client: Optional["Client"] = getattr(_local, "client", None)
+    if client is None:
+        # supabase is imported on first use to keep API startup fast
+        from supabase import create_client
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        _local.client = client
+    return client
+
+
+async def run(query: Callable[["Client"], Any]) -> Any:
+    """
+    Build and execute a query on the database pool
+
+    Usage:
+        result = await db.run(lambda c: c.table("voters").select("id").eq("epic_number", epic))
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _execute, query)
+
+
+# PostgREST HTTP method -> operation label
+_OPERATIONS = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+def _execute(query: Callable[["Client"], Any]) -> Any:
+    builder = query(get_client())
+
+    # Label by table (or rpc/<function>) and operation for supabase_calls_total
+    path = getattr(builder, "path", "").strip("/") or "unknown"
+    operation = "rpc" if path.startswith("rpc/") else _OPERATIONS.get(getattr(builder, "http_method", ""), "other")
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result = builder.execute()
+        outcome = "ok"
+        return result
+    finally:
+        SUPABASE_CALLS.inc(table=path, operation=operation, outcome=outcome)
+        SUPABASE_CALL_SECONDS.observe(time.perf_counter() - started, table=path, operation=operation)
+
+
+async def warm_up():
+    """Import supabase and create a pool thread's client ahead of the first query"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_executor, get_client)
+
+
+def shutdown():
+    """Stop accepting new queries and wait for in-flight ones to finish"""
+    _executor.shutdown(wait=True)
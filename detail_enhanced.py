@@ -1,7 +1,7 @@
 import requests
-import ddddocr
 import base64
 import time
+import threading
 from typing import Optional, Dict, Any, Tuple
 
 urltogetcaptcha="https://gateway-voters.eci.gov.in/api/v1/captcha-service/generateCaptcha"
@@ -14,14 +14,31 @@ proxies={
 headers = {"Content-Type": "application/json",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"}
 
-ocr = ddddocr.DdddOcr()
+# The ONNX captcha model is loaded on first use (or by warm_up) instead of at import
+_ocr = None
+_ocr_lock = threading.Lock()
+
+def get_ocr():
+    """Return the shared ddddocr instance, loading the model on first call"""
+    global _ocr
+    if _ocr is None:
+        with _ocr_lock:
+            if _ocr is None:
+                import ddddocr
+                _ocr = ddddocr.DdddOcr()
+    return _ocr
 
 def solve_with_ddddocr(image_path: str) -> str:
     """Solve captcha using ddddOCR"""
     with open(image_path, 'rb') as f:
         image_bytes = f.read()
     
-    res = ocr.classification(image_bytes)
+    return solve_captcha_bytes(image_bytes)
+
+
+def solve_captcha_bytes(image_bytes: bytes) -> str:
+    """Solve captcha image bytes using ddddOCR (no temp file, safe to call from several threads)"""
+    res = get_ocr().classification(image_bytes)
     return res
 
 
@@ -46,10 +63,7 @@ def extract_voter_data(epNo: str, state_code: str = "S08", max_retries: int = 5)
                 captcha_id = data["id"]
 
                 image_bytes = base64.b64decode(captcha_value)
-                with open("captcha.jpg", "wb") as f:
-                    f.write(image_bytes)
-                    
-                captcha_ans = solve_with_ddddocr("captcha.jpg")
+                captcha_ans = solve_captcha_bytes(image_bytes)
                 print(f"Attempt {attempt}: Captcha solved: {captcha_ans}")
 
                 if len(captcha_ans) != 6:
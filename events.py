@@ -0,0 +1,69 @@
+"""
+Live job events
+In-process broadcaster that fans job progress and log entries out to Server-Sent Events subscribers
+"""
+
+import os
+import json
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+# Events buffered per subscriber before the oldest are dropped (slow clients never block a job)
+JOB_EVENTS_QUEUE_SIZE = int(os.getenv("JOB_EVENTS_QUEUE_SIZE", "1000"))
+
+# Seconds between SSE keep-alive comments when a job is quiet
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+# Event that ends a job's stream
+JOB_FINISHED_EVENT = "completed"
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class JobEventBroadcaster:
+    """
+    Publishes job events to every subscriber of that job
+
+    process_bulk_extraction publishes directly, so watching a job running in
+    this worker costs no database reads. The latest progress event of each
+    running job is kept so new subscribers get the current counters at once.
+    """
+
+    def __init__(self, queue_size: int = JOB_EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def latest(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent progress event of a running job"""
+        return self._latest.get(job_id)
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        """Queue an event for every subscriber of the job"""
+        message = {"event": event, "data": data}
+
+        if event == "progress":
+            self._latest[job_id] = message
+        elif event == JOB_FINISHED_EVENT:
+            self._latest.pop(job_id, None)
+
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                # Drop the oldest event rather than stall the job on a slow client
+                queue.get_nowait()
+            queue.put_nowait(message)
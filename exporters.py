@@ -0,0 +1,209 @@
+"""
+Voter export writers
+Turn batches of voter rows into CSV, XLSX or Parquet byte streams without holding the full export in memory
+"""
+
+import io
+import os
+import csv
+import json
+import asyncio
+import tempfile
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+# Bytes read per chunk when streaming a finished XLSX file
+XLSX_STREAM_CHUNK_BYTES = 256 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+def parquet_available() -> bool:
+    """Parquet export needs the optional pyarrow package"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cell(value: Any) -> Any:
+    # Nested JSON (raw_response, extraction_metadata) is written as a JSON string
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+async def stream_csv(batches: AsyncIterator[List[Dict[str, Any]]], columns: Optional[List[str]]) -> AsyncIterator[bytes]:
+    """Yield a CSV file batch by batch (header comes from columns or the first row)"""
+    buffer = io.StringIO()
+    writer = None
+
+    # UTF-8 BOM so Excel shows Hindi-script names correctly
+    yield "\ufeff".encode("utf-8")
+
+    async for rows in batches:
+        if writer is None:
+            fieldnames = columns or list(rows[0].keys())
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+
+        for row in rows:
+            writer.writerow({key: _cell(value) for key, value in row.items()})
+
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if writer is None and columns:
+        yield (",".join(columns) + "\r\n").encode("utf-8")
+
+
+async def stream_xlsx(batches: AsyncIterator[List[Dict[str, Any]]], columns: Optional[List[str]]) -> AsyncIterator[bytes]:
+    """
+    Yield an XLSX workbook
+
+    Rows are appended to a write-only worksheet (spooled to disk by openpyxl),
+    so memory stays bounded; the zip container can only be streamed once the
+    last batch has been written.
+    """
+    from openpyxl import Workbook
+
+    loop = asyncio.get_running_loop()
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("voters")
+    fieldnames = columns
+
+    if fieldnames:
+        sheet.append(fieldnames)
+
+    async for rows in batches:
+        if fieldnames is None:
+            fieldnames = list(rows[0].keys())
+            sheet.append(fieldnames)
+        # Cell serialization is slow enough to stall other requests; one batch at a time, off the event loop
+        await loop.run_in_executor(None, _append_rows, sheet, rows, fieldnames)
+
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        await loop.run_in_executor(None, workbook.save, path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, XLSX_STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def _append_rows(sheet, rows: List[Dict[str, Any]], fieldnames: List[str]):
+    for row in rows:
+        sheet.append([_cell(row.get(name)) for name in fieldnames])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the stream"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# Parquet column types that are not strings. Every other column is written as
+# a string, so the schema is fixed up front and never depends on which values
+# happen to be null in a batch.
+PARQUET_INT_COLUMNS = frozenset(["age", "birth_year", "part_number", "ac_number"])
+PARQUET_BOOL_COLUMNS = frozenset(["is_active", "is_deleted"])
+
+
+def _parquet_type(name: str):
+    import pyarrow as pa
+
+    if name in PARQUET_INT_COLUMNS:
+        return pa.int64()
+    if name in PARQUET_BOOL_COLUMNS:
+        return pa.bool_()
+    return pa.string()
+
+
+def _parquet_value(name: str, value: Any) -> Any:
+    """Coerce a value to its column's Parquet type (values that do not fit become null)"""
+    if value is None:
+        return None
+    if name in PARQUET_INT_COLUMNS:
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, float):
+            # Never truncate: a fractional value is not a valid entry for these columns
+            return int(value) if value.is_integer() else None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if name in PARQUET_BOOL_COLUMNS:
+        if isinstance(value, str):
+            return value.strip().lower() in ("true", "t", "y", "yes", "1")
+        return bool(value)
+    value = _cell(value)
+    return value if isinstance(value, str) else str(value)
+
+
+async def stream_parquet(batches: AsyncIterator[List[Dict[str, Any]]], columns: Optional[List[str]]) -> AsyncIterator[bytes]:
+    """
+    Yield a Parquet file, one row group per batch
+
+    The schema comes from the column names alone (see _parquet_type), so a
+    later batch can never conflict with it once the response has started.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+
+    async for rows in batches:
+        if schema is None:
+            fieldnames = columns or list(rows[0].keys())
+            schema = pa.schema([pa.field(name, _parquet_type(name)) for name in fieldnames])
+            writer = pq.ParquetWriter(sink, schema)
+
+        data = {name: [_parquet_value(name, row.get(name)) for row in rows] for name in schema.names}
+
+        writer.write_table(pa.table(data, schema=schema))
+        yield sink.drain()
+
+    if writer is None:
+        schema = pa.schema([pa.field(name, _parquet_type(name)) for name in (columns or [])])
+        writer = pq.ParquetWriter(sink, schema)
+
+    writer.close()
+    yield sink.drain()
+
+
+EXPORT_WRITERS = {
+    "csv": stream_csv,
+    "xlsx": stream_xlsx,
+    "parquet": stream_parquet
+}
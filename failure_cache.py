@@ -0,0 +1,86 @@
+"""
+Negative cache of failed EPICs
+Persistent record of EPICs the ECI portal recently failed to return, with exponential backoff before they are tried again
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+import database as db
+
+# Seconds an EPIC is skipped after its first failed extraction (0 disables the cache)
+FAILED_EPIC_TTL_SECONDS = float(os.getenv("FAILED_EPIC_TTL_SECONDS", "21600"))
+
+# Each further failure multiplies the wait by this factor, up to the maximum
+FAILED_EPIC_BACKOFF_FACTOR = float(os.getenv("FAILED_EPIC_BACKOFF_FACTOR", "2"))
+FAILED_EPIC_MAX_TTL_SECONDS = float(os.getenv("FAILED_EPIC_MAX_TTL_SECONDS", "604800"))
+
+# EPIC numbers per failed_epics lookup query
+FAILED_EPIC_CHECK_CHUNK_SIZE = int(os.getenv("FAILED_EPIC_CHECK_CHUNK_SIZE", "200"))
+
+
+def enabled() -> bool:
+    return FAILED_EPIC_TTL_SECONDS > 0
+
+
+def is_active(failure: Dict[str, Any]) -> bool:
+    """True while the EPIC is still inside its backoff window (decided by the database clock)"""
+    return bool(failure.get("active"))
+
+
+def describe(failure: Dict[str, Any]) -> str:
+    """Message reported when an extraction is skipped because of a recent failure"""
+    return (
+        f"Recently failed ({failure['failure_count']}x, last: {failure['last_reason']}); "
+        f"skipped until {failure['retry_after']} unless force=true"
+    )
+
+
+async def find_failures(epic_numbers: List[str], state_code: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Map EPIC numbers to their failed_epics rows for one state
+
+    Rows whose backoff has already expired are included (see is_active), so
+    callers know which entries to clear after a successful extraction.
+    Each chunk is one find_epic_failures call.
+    """
+    if not enabled():
+        return {}
+
+    unique_epics = list(dict.fromkeys(epic_numbers))
+    failures = {}
+    for start in range(0, len(unique_epics), FAILED_EPIC_CHECK_CHUNK_SIZE):
+        chunk = unique_epics[start:start + FAILED_EPIC_CHECK_CHUNK_SIZE]
+        result = await db.run(lambda c: c.rpc("find_epic_failures", {
+            "p_state_code": state_code,
+            "p_epic_numbers": chunk
+        }))
+        for row in result.data or []:
+            failures[row["epic_number"]] = row
+    return failures
+
+
+async def find_failure(epic_number: str, state_code: str) -> Optional[Dict[str, Any]]:
+    return (await find_failures([epic_number], state_code)).get(epic_number)
+
+
+async def record_failure(epic_number: str, state_code: str, reason: str, attempts: int):
+    """Store a failed extraction, extending the EPIC's backoff (one round-trip, see record_epic_failure)"""
+    if not enabled():
+        return
+
+    await db.run(lambda c: c.rpc("record_epic_failure", {
+        "p_epic_number": epic_number,
+        "p_state_code": state_code,
+        "p_reason": reason,
+        "p_attempts": attempts,
+        "p_ttl_seconds": FAILED_EPIC_TTL_SECONDS,
+        "p_backoff_factor": FAILED_EPIC_BACKOFF_FACTOR,
+        "p_max_ttl_seconds": FAILED_EPIC_MAX_TTL_SECONDS
+    }))
+
+
+async def clear_failure(epic_number: str, state_code: str):
+    """Forget an EPIC's failures once it was extracted"""
+    await db.run(lambda c: c.table("failed_epics").delete()
+        .eq("epic_number", epic_number).eq("state_code", state_code))
@@ -0,0 +1,81 @@
+"""
+Background health prober
+Runs dependency checks on an interval so health endpoints answer from a cached snapshot
+"""
+
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Seconds between dependency probes, and how long a single check may take
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "5"))
+
+# A check returns "healthy" or "degraded"; raising (or timing out) marks it "unhealthy"
+HealthCheck = Callable[[], Awaitable[str]]
+
+
+class HealthProber:
+    """
+    Probes named dependencies in the background and keeps the latest results
+
+    snapshot() never touches a dependency, so load-balancer probes cost
+    nothing beyond building a small dict. Until the first probe finishes,
+    every check reports "unknown".
+    """
+
+    def __init__(self, checks: Dict[str, HealthCheck], interval: float = HEALTH_CHECK_INTERVAL_SECONDS, timeout: float = HEALTH_CHECK_TIMEOUT_SECONDS):
+        self.checks = checks
+        self.interval = interval
+        self.timeout = timeout
+        self.results: Dict[str, Dict[str, Any]] = {
+            name: {"status": "unknown", "latency_ms": None, "error": None} for name in checks
+        }
+        self.checked_at: Optional[datetime] = None
+        self._checked_monotonic: Optional[float] = None
+
+    async def probe(self):
+        """Run every check concurrently and store the results"""
+        names = list(self.checks)
+        results = await asyncio.gather(*(self._run_check(self.checks[name]) for name in names))
+        self.results = dict(zip(names, results))
+        self.checked_at = datetime.now()
+        self._checked_monotonic = time.monotonic()
+
+    async def probe_periodically(self):
+        """Background loop: probe now, then every interval seconds"""
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                print(f"Health probe failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest check results plus their age"""
+        age = time.monotonic() - self._checked_monotonic if self._checked_monotonic is not None else None
+        return {
+            "checks": {name: dict(result) for name, result in self.results.items()},
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "snapshot_age_seconds": round(age, 3) if age is not None else None,
+            # No probe has completed for three intervals - the prober itself is stuck
+            "stale": age is None or age > 3 * self.interval
+        }
+
+    async def _run_check(self, check: HealthCheck) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(check(), timeout=self.timeout)
+            error = None
+        except asyncio.TimeoutError:
+            status, error = "unhealthy", f"Timed out after {self.timeout:g}s"
+        except Exception as e:
+            status, error = "unhealthy", str(e)
+
+        return {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": error
+        }
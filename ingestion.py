@@ -0,0 +1,206 @@
+"""
+Upload ingestion
+Single-pass, chunked extraction of EPIC numbers from CSV/Excel uploads spooled to disk
+"""
+
+import os
+import re
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Rows parsed per CSV chunk
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "50000"))
+
+# Bytes copied per read when spooling an upload to disk
+SPOOL_COPY_BYTES = 1024 * 1024
+
+# Values treated as a header row when the EPIC column is not named
+HEADER_WORDS = {'epic', 'epic_number', 'epic number', 'epic no'}
+
+# Accepted EPIC formats after normalization: current (ABC1234567) and legacy state-issued (HP/04/020/174079)
+EPIC_FORMATS = [
+    r"[A-Z]{3}[0-9]{7}",
+    r"[A-Z]{2}/[0-9]{2}/[0-9]{3}/[0-9]{6,7}"
+]
+EPIC_PATTERN = "(?:" + "|".join(EPIC_FORMATS) + ")"
+
+# Normalization: all whitespace, and a trailing .0 left by numeric spreadsheet cells, are removed
+EPIC_WHITESPACE = r"\s+"
+EPIC_NUMERIC_SUFFIX = r"\.0+$"
+_EPIC_WHITESPACE_RE = re.compile(EPIC_WHITESPACE)
+_EPIC_NUMERIC_SUFFIX_RE = re.compile(EPIC_NUMERIC_SUFFIX)
+
+# Rejected values echoed back in the validation report
+MAX_REJECTED_REPORTED = int(os.getenv("MAX_REJECTED_REPORTED", "100"))
+
+
+def spool_to_disk(source: BinaryIO, filename: str) -> Tuple[str, int]:
+    """
+    Copy an uploaded file object to a temporary file on disk
+
+    Returns:
+        Tuple of (path, size in bytes). The caller removes the file.
+    """
+    suffix = os.path.splitext(filename)[1]
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as target:
+        shutil.copyfileobj(source, target, SPOOL_COPY_BYTES)
+        return target.name, target.tell()
+
+
+def read_epic_numbers(path: str, filename: str, epic_column: str) -> List[str]:
+    """Read the EPIC column of an uploaded CSV/Excel file in a single pass"""
+    epic_numbers: List[str] = []
+    for chunk in iter_epic_chunks(path, filename, epic_column):
+        epic_numbers.extend(chunk)
+    return epic_numbers
+
+
+def iter_epic_chunks(path: str, filename: str, epic_column: str) -> Iterator[List[str]]:
+    """
+    Yield EPIC values from an uploaded file in chunks
+
+    The header is detected from the first row only. If epic_column is not
+    present, the first column is used and header-like values are dropped.
+    """
+    if filename.endswith('.csv'):
+        yield from _iter_csv(path, epic_column)
+    elif filename.endswith('.xlsx'):
+        yield from _iter_xlsx(path, epic_column)
+    else:
+        yield from _iter_xls(path, epic_column)
+
+
+def _iter_csv(path: str, epic_column: str) -> Iterator[List[str]]:
+    # pandas is imported on first upload to keep API startup fast
+    import pandas as pd
+
+    # Only the header line is parsed to find the column
+    header = pd.read_csv(path, nrows=0).columns
+
+    if epic_column in header:
+        reader = pd.read_csv(path, usecols=[epic_column], dtype=str, chunksize=CSV_CHUNK_SIZE)
+        for chunk in reader:
+            yield chunk[epic_column].dropna().tolist()
+    else:
+        reader = pd.read_csv(path, header=None, usecols=[0], dtype=str, chunksize=CSV_CHUNK_SIZE)
+        for chunk in reader:
+            yield _filter_headerless(chunk[0].dropna().tolist())
+
+
+def _iter_xlsx(path: str, epic_column: str) -> Iterator[List[str]]:
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the sheet XML instead of building the whole workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        first_row = next(rows, None)
+        if first_row is None:
+            return
+
+        header = [str(value) if value is not None else None for value in first_row]
+        has_header = epic_column in header
+        index = header.index(epic_column) if has_header else 0
+
+        chunk: List[str] = []
+        if not has_header:
+            chunk.extend(_filter_headerless(_cell_values([first_row], index)))
+
+        batch: List[Tuple[Any, ...]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= CSV_CHUNK_SIZE:
+                values = _cell_values(batch, index)
+                chunk.extend(values if has_header else _filter_headerless(values))
+                yield chunk
+                chunk, batch = [], []
+
+        values = _cell_values(batch, index)
+        chunk.extend(values if has_header else _filter_headerless(values))
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def _iter_xls(path: str, epic_column: str) -> Iterator[List[str]]:
+    import pandas as pd
+
+    # Legacy .xls has no streaming reader; parse once without a header and inspect the first row
+    df = pd.read_excel(path, header=None, dtype=str)
+    if df.empty:
+        return
+
+    header = df.iloc[0].tolist()
+    if epic_column in header:
+        column = header.index(epic_column)
+        yield df.iloc[1:, column].dropna().tolist()
+    else:
+        yield _filter_headerless(df.iloc[:, 0].dropna().tolist())
+
+
+def _cell_values(rows: List[Tuple[Any, ...]], index: int) -> List[str]:
+    values = []
+    for row in rows:
+        value: Optional[Any] = row[index] if index < len(row) else None
+        if value is not None:
+            values.append(str(value))
+    return values
+
+
+def normalize_epic_number(value: Any) -> str:
+    """Canonical form of one EPIC value, by the same rules as clean_epic_numbers ("" for a blank value)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    text = _EPIC_WHITESPACE_RE.sub("", str(value).upper())
+    return _EPIC_NUMERIC_SUFFIX_RE.sub("", text)
+
+
+def clean_epic_numbers(values: List[Any]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Normalize, validate and de-duplicate EPIC numbers in one vectorized pass
+
+    Values are normalized as by normalize_epic_number (upper-cased, all
+    whitespace and a trailing .0 removed), then matched against EPIC_FORMATS.
+    Blank values are skipped; repeats keep their first occurrence.
+
+    Returns:
+        Tuple of (unique valid EPICs in input order, validation report)
+    """
+    import pandas as pd
+
+    raw = pd.Series(values, dtype="object")
+    normalized = (
+        raw.fillna("").astype(str)
+        .str.upper()
+        .str.replace(EPIC_WHITESPACE, "", regex=True)
+        .str.replace(EPIC_NUMERIC_SUFFIX, "", regex=True)
+    )
+
+    blank = normalized == ""
+    valid = normalized.str.fullmatch(EPIC_PATTERN)
+    rejected = raw[~valid & ~blank]
+    accepted = normalized[valid]
+    unique = accepted.drop_duplicates()
+
+    report = {
+        "total_rows": len(raw),
+        "accepted": len(unique),
+        "duplicates_removed": len(accepted) - len(unique),
+        "blank": int(blank.sum()),
+        "rejected": len(rejected),
+        "rejected_values": [str(value) for value in rejected.head(MAX_REJECTED_REPORTED)]
+    }
+    return unique.tolist(), report
+
+
+def warm_up():
+    """Import pandas ahead of the first upload"""
+    import pandas  # noqa: F401
+
+
+def _filter_headerless(values: List[str]) -> List[str]:
+    # Drop header-like values (in case first row was a header); everything else is validated by clean_epic_numbers
+    return [e for e in values if e.strip().lower() not in HEADER_WORDS]
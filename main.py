@@ -3,33 +3,52 @@ ECI Voter Data Extraction API
 FastAPI backend for voter data extraction and management
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Form
+# Imported first so the startup breakdown covers every import below
+from startup import startup_timer
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import sys
 import os
 import uuid
-from datetime import datetime
+import time
+import re
+import json
+import math
+import base64
+from datetime import datetime, timedelta
 import asyncio
-import pandas as pd
-import io
 
-import detail_enhanced as detail
+startup_timer.mark("framework imports")
 
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import detail_enhanced as detail
+import database as db
+import ingestion
+import failure_cache
+from caching import SingleFlight, TTLCache, StaleWhileRevalidateCache
+from aggregates import VoterAggregates
+from exporters import EXPORT_MEDIA_TYPES, EXPORT_WRITERS, parquet_available
+from voter_records import VOTER_RECORD_COLUMNS, parse_eci_response
+from events import JobEventBroadcaster, JOB_FINISHED_EVENT, SSE_KEEPALIVE_SECONDS, format_sse
+from health import HealthProber, HEALTH_CHECK_TIMEOUT_SECONDS
+from serialization import CompressionMiddleware, FastJSONResponse, LISTING_FORMATS, to_columnar
+import metrics
+from metrics import (
+    EXTRACTION_ATTEMPTS, EXTRACTIONS_COALESCED, JOB_RECORDS, JOB_THROUGHPUT, JOBS_RUNNING, METRICS_CONTENT_TYPE,
+    MetricsMiddleware, VOTER_STAGE_SECONDS
+)
 
-# Load .env.local for local development (Railway will use environment variables directly)
-load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env.local'))
+startup_timer.mark("app modules")
 
 # Initialize FastAPI app
 app = FastAPI(
     title="ECI Voter Data Extraction API",
     description="API for extracting voter data from ECI portal",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware - add your deployed frontend URL here
@@ -47,26 +66,95 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Supabase client - check multiple env var formats
-SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+# gzip/brotli for complete responses, negotiated from Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency histograms for /metrics (outermost, so compression time is included)
+app.add_middleware(MetricsMiddleware)
+
+# Number of EPICs resolved per duplicate pre-check query (keeps the in.(...) URL short)
+DUPLICATE_CHECK_CHUNK_SIZE = int(os.getenv("DUPLICATE_CHECK_CHUNK_SIZE", "200"))
+
+# Batch voter lookup: EPICs accepted per request, and chunk queries run at once
+VOTER_LOOKUP_MAX_EPICS = int(os.getenv("VOTER_LOOKUP_MAX_EPICS", "50000"))
+VOTER_LOOKUP_CONCURRENCY = int(os.getenv("VOTER_LOOKUP_CONCURRENCY", "4"))
+
+# Voters sent per multi-row insert by save_voters_to_db
+VOTER_SAVE_BATCH_SIZE = int(os.getenv("VOTER_SAVE_BATCH_SIZE", "500"))
+
+# In-process cache of voter rows keyed by EPIC number
+VOTER_CACHE_MAX_ENTRIES = int(os.getenv("VOTER_CACHE_MAX_ENTRIES", "50000"))
+VOTER_CACHE_TTL_SECONDS = float(os.getenv("VOTER_CACHE_TTL_SECONDS", "600"))
+VOTER_CACHE_MAX_MB = float(os.getenv("VOTER_CACHE_MAX_MB", "64"))
+
+voter_cache = TTLCache(
+    max_entries=VOTER_CACHE_MAX_ENTRIES,
+    ttl_seconds=VOTER_CACHE_TTL_SECONDS,
+    max_bytes=int(VOTER_CACHE_MAX_MB * 1024 * 1024)
+)
+
+# Running demographic counts, updated on every insert (see aggregates.py)
+voter_aggregates = VoterAggregates()
+
+# Compact voter projection: the fields list views actually show
+VOTER_SUMMARY_COLUMNS = [
+    "id", "epic_number", "full_name", "full_name_l1", "age", "gender",
+    "relation_type", "relative_full_name", "part_number", "part_name",
+    "ac_number", "asmbly_name", "district_value", "created_at"
+]
+
+# Analytics view results are served from memory and refreshed in the background
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "60"))
+ANALYTICS_CACHE_MAX_STALE_SECONDS = float(os.getenv("ANALYTICS_CACHE_MAX_STALE_SECONDS", "600"))
+
+# Rows fetched per query when streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# extraction_jobs progress is written at most once every N records or T seconds
+JOB_PROGRESS_EVERY_N = int(os.getenv("JOB_PROGRESS_EVERY_N", "25"))
+JOB_PROGRESS_INTERVAL_SECONDS = float(os.getenv("JOB_PROGRESS_INTERVAL_SECONDS", "5"))
+
+# Unfinished jobs whose progress has not moved for this long are taken over and resumed
+JOB_RESUME_STALE_SECONDS = float(os.getenv("JOB_RESUME_STALE_SECONDS", "120"))
+JOB_RESUME_SCAN_INTERVAL_SECONDS = float(os.getenv("JOB_RESUME_SCAN_INTERVAL_SECONDS", "60"))
+
+# Running jobs refresh progress_updated_at this often, so a slow EPIC never makes a live job look stale
+JOB_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("JOB_HEARTBEAT_INTERVAL_SECONDS", "30"))
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("Environment variables:")
-    print(f"SUPABASE_URL: {os.getenv('SUPABASE_URL')}")
-    print(f"NEXT_PUBLIC_SUPABASE_URL: {os.getenv('NEXT_PUBLIC_SUPABASE_URL')}")
-    raise ValueError("Supabase credentials not found in environment variables. Please set SUPABASE_URL and SUPABASE_KEY")
+# How long shutdown waits for running jobs to checkpoint after the EPIC in progress
+JOB_SHUTDOWN_GRACE_SECONDS = float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", "10"))
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Heavy dependencies (captcha model, pandas, Supabase client) load on first use unless warmed up after startup
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# extraction_jobs columns returned by the job endpoints (input_epics can be large and is left out)
+JOB_COLUMNS = [
+    "id", "job_name", "job_type", "status", "file_name", "file_size", "state_code",
+    "total_records", "processed_records", "successful_records", "failed_records", "duplicate_records",
+    "failed_epics", "force_retry", "started_at", "completed_at", "created_at", "progress_updated_at"
+]
+
+# Job statuses that end a job's event stream (interrupted jobs are resumed, so they are not final)
+TERMINAL_JOB_STATUSES = ("completed", "failed", "cancelled")
+
+# Live progress and log events of jobs running in this worker (served at /api/jobs/{job_id}/events)
+job_events = JobEventBroadcaster()
 
 # Pydantic models
 class EPICRequest(BaseModel):
     epic_number: str
     state_code: str = "S08"  # Default to Himachal Pradesh
+    force: bool = False  # Extract even if the EPIC failed recently
 
 class BulkEPICRequest(BaseModel):
     epic_numbers: List[str]
     state_code: str = "S08"
+    force: bool = False
+
+class VoterLookupRequest(BaseModel):
+    epic_numbers: List[str]
+    fields: Optional[str] = None  # Same values as ?fields= on /api/voters/search
+    format: str = "rows"  # rows or columnar
 
 class ExtractionResponse(BaseModel):
     status: str
@@ -83,171 +171,446 @@ class JobStatus(BaseModel):
     successful_records: int
     failed_records: int
     duplicate_records: int
+    last_progress_at: Optional[str] = None
 
 # Helper Functions
-def parse_eci_response(response_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Parse and structure ECI API response"""
-    return {
-        "epic_id": response_data.get("epicId"),
-        "epic_number": response_data.get("epicNumber"),
-        "form_reference_no": response_data.get("formReferenceNo"),
-        
-        # Personal Information
-        "applicant_first_name": response_data.get("applicantFirstName"),
-        "applicant_first_name_l1": response_data.get("applicantFirstNameL1"),
-        "applicant_first_name_l2": response_data.get("applicantFirstNameL2"),
-        "applicant_last_name": response_data.get("applicantLastName"),
-        "applicant_last_name_l1": response_data.get("applicantLastNameL1"),
-        "applicant_last_name_l2": response_data.get("applicantLastNameL2"),
-        "full_name": response_data.get("fullName"),
-        "full_name_l1": response_data.get("fullNameL1"),
-        
-        # Demographics
-        "age": response_data.get("age"),
-        "gender": response_data.get("gender"),
-        "gender_l1": response_data.get("genderL1"),
-        "birth_year": response_data.get("birthYear"),
-        
-        # Relation Information
-        "relation_type": response_data.get("relationType"),
-        "relation_type_l1": response_data.get("relationTypeL1"),
-        "relation_name": response_data.get("relationName"),
-        "relation_name_l1": response_data.get("relationNameL1"),
-        "relation_name_l2": response_data.get("relationNameL2"),
-        "relation_lname": response_data.get("relationLName"),
-        "relation_lname_l1": response_data.get("relationLNameL1"),
-        "relative_full_name": response_data.get("relativeFullName"),
-        "relative_full_name_l1": response_data.get("relativeFullNameL1"),
-        
-        # Location Information
-        "part_number": response_data.get("partNumber"),
-        "part_id": response_data.get("partId"),
-        "part_name": response_data.get("partName"),
-        "part_name_l1": response_data.get("partNameL1"),
-        "part_serial_number": response_data.get("partSerialNumber"),
-        "section_no": response_data.get("sectionNo"),
-        
-        # Assembly/Parliamentary Details
-        "asmbly_name": response_data.get("asmblyName"),
-        "asmbly_name_l1": response_data.get("asmblyNameL1"),
-        "ac_id": response_data.get("acId"),
-        "ac_number": response_data.get("acNumber"),
-        "prlmnt_name": response_data.get("prlmntName"),
-        "prlmnt_name_l1": response_data.get("prlmntNameL1"),
-        "prlmnt_no": response_data.get("prlmntNo"),
-        
-        # District/State
-        "district_value": response_data.get("districtValue"),
-        "district_value_l1": response_data.get("districtValueL1"),
-        "district_cd": response_data.get("districtCd"),
-        "district_id": response_data.get("districtId"),
-        "district_no": response_data.get("districtNo"),
-        "state_name": response_data.get("stateName"),
-        "state_name_l1": response_data.get("stateNameL1"),
-        "state_id": response_data.get("stateId"),
-        "state_cd": response_data.get("stateCd"),
-        
-        # Polling Station Details
-        "ps_building_name": response_data.get("psbuildingName"),
-        "ps_building_name_l1": response_data.get("psBuildingNameL1"),
-        "ps_room_details": response_data.get("psRoomDetails"),
-        "ps_room_details_l1": response_data.get("psRoomDetailsL1"),
-        "building_address": response_data.get("buildingAddress"),
-        "building_address_l1": response_data.get("buildingAddressL1"),
-        "part_lat_long": response_data.get("partLatLong"),
-        
-        # Disability Information
-        "disability_any": response_data.get("disabilityAny"),
-        "disability_type": response_data.get("disabilityType"),
-        "is_locomotor_disabled": response_data.get("isLocomotorDisabled"),
-        "is_speech_hearing_disabled": response_data.get("isSpeechHearingDisabled"),
-        "is_visually_impaired": response_data.get("isVisuallyImpaired"),
-        "other_disability": response_data.get("otherDisability"),
-        "is_wheelchair_required": response_data.get("isWheelchairRequired"),
-        "pwd": response_data.get("pwd"),
-        "pwd_marking_form_type": response_data.get("pwdMarkingFormType"),
-        "pwd_marking_ref_no": response_data.get("pwdMarkingRefNo"),
-        
-        # Form/Process Information
-        "form_type": response_data.get("formType"),
-        "process_type": response_data.get("processType"),
-        "status_type": response_data.get("statusType"),
-        "revision_id": response_data.get("revisionId"),
-        
-        # Timestamps
-        "created_dttm": response_data.get("createdDttm"),
-        "modified_dttm": response_data.get("modifiedDttm"),
-        "epic_datetime": response_data.get("epicDatetime"),
-        
-        # Flags
-        "is_active": response_data.get("isActive", True),
-        "is_deleted": response_data.get("isDeleted", False),
-        "is_validated": response_data.get("isValidated"),
-        "is_vip": response_data.get("isVip"),
-        "is_form8_migration": response_data.get("isForm8Migration"),
-        
-        # Store raw response
-        "raw_response": response_data,
-        "extraction_metadata": {
-            "extracted_at": datetime.now().isoformat(),
-            "api_version": "1.0"
-        }
-    }
+# Every stored voter column except the raw ECI payload
+VOTER_FULL_COLUMNS = ["id"] + [column for column in VOTER_RECORD_COLUMNS if column != "raw_response"] + ["created_at"]
+
+# Named projections for voter read endpoints (?fields=); None selects every column
+VOTER_FIELD_PRESETS: Dict[str, Optional[List[str]]] = {
+    "summary": VOTER_SUMMARY_COLUMNS,
+    "full": VOTER_FULL_COLUMNS,
+    "raw": None
+}
+
+def resolve_voter_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Turn ?fields= into a column list (None means every column)
+    
+    Accepts a preset name from VOTER_FIELD_PRESETS or comma-separated column
+    names. Defaults to the summary preset. id and created_at are always
+    included because pagination cursors are built from them.
+    """
+    fields = (fields or "summary").strip()
+    if fields in VOTER_FIELD_PRESETS:
+        return VOTER_FIELD_PRESETS[fields]
+    
+    columns = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [c for c in columns if c not in VOTER_FULL_COLUMNS and c != "raw_response"]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown voter fields: {', '.join(unknown)}")
+    
+    for key in ("id", "created_at"):
+        if key not in columns:
+            columns.append(key)
+    return columns
+
+def check_listing_format(format: str):
+    """Reject an unknown ?format= for voter listings with a 400"""
+    if format not in LISTING_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(LISTING_FORMATS)}")
+
+def format_voter_listing(voters: List[Dict[str, Any]], format: str) -> Any:
+    """
+    Voter rows as a list of objects (rows) or one array per field (columnar)
+    
+    columnar drops the per-row repetition of field names, which dominates
+    the size of wide pages.
+    """
+    return to_columnar(voters) if format == "columnar" else voters
+
+def select_columns(columns: Optional[List[str]]) -> str:
+    """PostgREST select clause for a column list from resolve_voter_fields"""
+    return "*" if columns is None else ",".join(columns)
+
+def cache_voter(row: Dict[str, Any], complete: bool):
+    """
+    Remember a voter row in voter_cache
+    
+    complete marks rows fetched with select("*") or returned by an insert.
+    A partial row never replaces a complete one that is still cached.
+    """
+    epic_number = row.get("epic_number")
+    if not epic_number:
+        return
+    
+    if not complete:
+        cached = voter_cache.peek(epic_number)
+        if cached and cached["complete"]:
+            return
+    
+    voter_cache.set(epic_number, {"row": row, "complete": complete})
+
+def get_cached_voter(epic_number: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Return a cached voter row holding the given columns (all columns if None)"""
+    def has_columns(entry: Dict[str, Any]) -> bool:
+        if entry["complete"]:
+            return True
+        return columns is not None and all(column in entry["row"] for column in columns)
+    
+    entry = voter_cache.get(epic_number, accept=has_columns)
+    return entry["row"] if entry else None
 
-async def save_voter_to_db(voter_data: Dict[str, Any]) -> str:
-    """Save voter data to Supabase"""
+async def lookup_voter(epic_number: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Fetch a voter by EPIC number, serving repeat lookups from voter_cache"""
+    row = get_cached_voter(epic_number, columns)
+    
+    if row is None:
+        # Fetch the complete row so later lookups for any projection are served from the cache
+        result = await db.run(lambda c: c.table("voters").select("*").eq("epic_number", epic_number))
+        if not result.data:
+            return None
+        row = result.data[0]
+        cache_voter(row, complete=True)
+    
+    if columns is None:
+        return row
+    return {column: row.get(column) for column in columns}
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Pack the sort key of the last returned row into an opaque pagination cursor"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+# Cursor values end up inside PostgREST filter strings, so each key only accepts its own shape
+CURSOR_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}(:?\d{2})?)?")
+CURSOR_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+def is_valid_cursor_value(key: str, value: Any) -> bool:
+    if key == "created_at":
+        return isinstance(value, str) and CURSOR_TIMESTAMP.fullmatch(value) is not None
+    if key == "id":
+        return isinstance(value, str) and CURSOR_ID.fullmatch(value) is not None
+    if key == "rank":
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+    return False
+
+def decode_cursor(cursor: str, keys: List[str]) -> Dict[str, Any]:
+    """Unpack a cursor from encode_cursor, rejecting anything malformed with a 400"""
     try:
-        # Check for duplicate
-        existing = supabase.table("voters").select("id").eq("epic_number", voter_data["epic_number"]).execute()
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if not isinstance(values, dict) or any(key not in values or not is_valid_cursor_value(key, values[key]) for key in keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {key: values[key] for key in keys}
+
+def apply_created_keyset(query, cursor: Optional[Dict[str, Any]]):
+    """Order newest first by (created_at, id) and continue after the cursor row, if any"""
+    query = query.order("created_at", desc=True).order("id", desc=True)
+    if cursor:
+        created_at, row_id = cursor["created_at"], cursor["id"]
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+    return query
+
+def next_created_cursor(rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """Cursor for the page after rows, or None if this was the last page"""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor({"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]})
+
+async def search_voters_by_name(
+    query: str,
+    part_number: Optional[int] = None,
+    ac_number: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+    cursor: Optional[Dict[str, Any]] = None,
+    columns: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Ranked name search over full_name, full_name_l1 and relative_full_name
+    
+    The search_voters_ranked function (migrations/002, 003) resolves matching
+    ids through trigram indexes; the rows are then fetched by primary key.
+    A cursor ({"rank", "id"} of the last row seen) takes precedence over offset.
+    columns projects the fetched rows (None selects every column).
+    """
+    params = {"p_query": query, "p_limit": limit, "p_offset": 0 if cursor else offset}
+    if part_number is not None:
+        params["p_part_number"] = part_number
+    if ac_number is not None:
+        params["p_ac_number"] = ac_number
+    if cursor:
+        params["p_after_rank"] = cursor["rank"]
+        params["p_after_id"] = cursor["id"]
+    
+    ranked = await db.run(lambda c: c.rpc("search_voters_ranked", params))
+    if not ranked.data:
+        return []
+    
+    voter_ids = [r["voter_id"] for r in ranked.data]
+    result = await db.run(lambda c: c.table("voters").select(select_columns(columns)).in_("id", voter_ids))
+    rows_by_id = {row["id"]: row for row in result.data or []}
+    
+    voters = []
+    for r in ranked.data:
+        row = rows_by_id.get(r["voter_id"])
+        if row:
+            voters.append({**row, "search_rank": r["search_rank"]})
+    return voters
+
+async def iter_voter_batches(
+    columns: Optional[List[str]],
+    job_id: Optional[str] = None,
+    part_number: Optional[int] = None,
+    ac_number: Optional[int] = None,
+    district: Optional[str] = None
+):
+    """
+    Yield voters matching the export filters in batches of up to EXPORT_BATCH_SIZE
+    
+    Without job_id the voters table is walked in id order (keyset pagination).
+    With job_id the job's successful and duplicate extraction_logs are walked
+    instead, and their EPICs are resolved with chunked in_ queries.
+    """
+    select = select_columns(columns)
+    
+    def apply_filters(query):
+        if part_number is not None:
+            query = query.eq("part_number", part_number)
+        if ac_number is not None:
+            query = query.eq("ac_number", ac_number)
+        if district:
+            query = query.eq("district_value", district)
+        return query
+    
+    last_id = None
+    
+    if not job_id:
+        while True:
+            def build_query(c, after=last_id):
+                query = apply_filters(c.table("voters").select(select)).order("id").limit(EXPORT_BATCH_SIZE)
+                return query.gt("id", after) if after is not None else query
+            
+            result = await db.run(build_query)
+            rows = result.data or []
+            if rows:
+                yield rows
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+            last_id = rows[-1]["id"]
+    
+    seen_voters = set()
+    while True:
+        def build_logs_query(c, after=last_id):
+            query = c.table("extraction_logs").select("id, epic_number").eq("job_id", job_id).in_("status", ["success", "duplicate"]).order("id").limit(EXPORT_BATCH_SIZE)
+            return query.gt("id", after) if after is not None else query
         
-        if existing.data:
-            raise HTTPException(status_code=409, detail="Voter already exists in database")
+        logs = (await db.run(build_logs_query)).data or []
+        epic_numbers = list(dict.fromkeys(log["epic_number"] for log in logs))
         
-        # Insert voter
-        result = supabase.table("voters").insert(voter_data).execute()
+        for start in range(0, len(epic_numbers), DUPLICATE_CHECK_CHUNK_SIZE):
+            chunk = epic_numbers[start:start + DUPLICATE_CHECK_CHUNK_SIZE]
+            result = await db.run(lambda c: apply_filters(c.table("voters").select(select).in_("epic_number", chunk)))
+            rows = [row for row in result.data or [] if row["id"] not in seen_voters]
+            seen_voters.update(row["id"] for row in rows)
+            if rows:
+                yield rows
         
-        if result.data:
-            return result.data[0]["id"]
+        if len(logs) < EXPORT_BATCH_SIZE:
+            return
+        last_id = logs[-1]["id"]
+
+async def find_existing_epics(epic_numbers: List[str]) -> Dict[str, str]:
+    """Map the EPIC numbers already stored in the voters table to their voter ids"""
+    unique_epics = list(dict.fromkeys(epic_numbers))
+    existing = {}
+    missing = []
+    
+    for epic_number in unique_epics:
+        cached = get_cached_voter(epic_number, ["id"])
+        if cached:
+            existing[epic_number] = cached["id"]
         else:
-            raise HTTPException(status_code=500, detail="Failed to save voter to database")
-            
+            missing.append(epic_number)
+    
+    for start in range(0, len(missing), DUPLICATE_CHECK_CHUNK_SIZE):
+        chunk = missing[start:start + DUPLICATE_CHECK_CHUNK_SIZE]
+        with VOTER_STAGE_SECONDS.time(stage="duplicate_check"):
+            result = await db.run(lambda c: c.table("voters").select("id, epic_number").in_("epic_number", chunk))
+        for row in result.data or []:
+            existing[row["epic_number"]] = row["id"]
+            cache_voter(row, complete=False)
+    
+    return existing
+
+def order_stored_first(epic_numbers: List[str], existing: Dict[str, str]) -> List[str]:
+    """
+    Reorder a job's input so EPICs already in the voters table (existing) come first
+    
+    Jobs process their stored input in order (processed_records is the
+    checkpoint), so this lets every pre-resolved duplicate be logged and
+    written in the job's first progress update.
+    """
+    return [e for e in epic_numbers if e in existing] + [e for e in epic_numbers if e not in existing]
+
+async def find_voters(epic_numbers: List[str], columns: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Map EPIC numbers to their stored voter rows (projected to columns, plus epic_number)
+    
+    Cached rows are used as is; the rest are fetched in chunks of
+    DUPLICATE_CHECK_CHUNK_SIZE, VOTER_LOOKUP_CONCURRENCY queries at a time.
+    """
+    if columns is not None and "epic_number" not in columns:
+        columns = columns + ["epic_number"]
+    
+    found = {}
+    missing = []
+    for epic_number in dict.fromkeys(epic_numbers):
+        cached = get_cached_voter(epic_number, columns)
+        if cached:
+            found[epic_number] = cached if columns is None else {column: cached.get(column) for column in columns}
+        else:
+            missing.append(epic_number)
+    
+    semaphore = asyncio.Semaphore(max(1, VOTER_LOOKUP_CONCURRENCY))
+    
+    async def fetch(chunk: List[str]):
+        async with semaphore:
+            result = await db.run(lambda c: c.table("voters").select(select_columns(columns)).in_("epic_number", chunk))
+        for row in result.data or []:
+            found[row["epic_number"]] = row
+            cache_voter(row, complete=columns is None)
+    
+    await asyncio.gather(*(
+        fetch(missing[start:start + DUPLICATE_CHECK_CHUNK_SIZE])
+        for start in range(0, len(missing), DUPLICATE_CHECK_CHUNK_SIZE)
+    ))
+    return found
+
+async def save_voter_to_db(voter_data: Dict[str, Any]) -> Tuple[str, bool]:
+    """
+    Save a parsed voter in a single round-trip (insert on conflict with a stored epic_number)
+    
+    Returns:
+        Tuple of (voter_id, created). created is False if the EPIC was already stored.
+    """
+    epic_number = voter_data["epic_number"]
+    cached = get_cached_voter(epic_number, ["id"])
+    if cached:
+        return cached["id"], False
+    
+    stored = await save_voters_to_db([voter_data])
+    if epic_number not in stored:
+        raise HTTPException(status_code=500, detail="Failed to save voter to database")
+    return stored[epic_number]
+
+async def save_voters_to_db(voters: List[Dict[str, Any]]) -> Dict[str, Tuple[str, bool]]:
+    """
+    Save many parsed voters with one multi-row insert per VOTER_SAVE_BATCH_SIZE rows
+    
+    Rows whose epic_number is already stored (or repeated in the batch) are
+    skipped by the database instead of failing the insert; their existing ids
+    are looked up afterwards.
+    
+    Returns:
+        Dict mapping epic_number to (voter_id, created)
+    """
+    stored: Dict[str, Tuple[str, bool]] = {}
+    pending: Dict[str, Dict[str, Any]] = {}
+    
+    for voter in voters:
+        epic_number = voter["epic_number"]
+        cached = get_cached_voter(epic_number, ["id"])
+        if cached:
+            stored[epic_number] = (cached["id"], False)
+        elif epic_number not in pending:
+            pending[epic_number] = voter
+    
+    rows = list(pending.values())
+    try:
+        for start in range(0, len(rows), VOTER_SAVE_BATCH_SIZE):
+            chunk = rows[start:start + VOTER_SAVE_BATCH_SIZE]
+            # ON CONFLICT (epic_number) DO NOTHING - only newly inserted rows come back
+            with VOTER_STAGE_SECONDS.time(stage="insert"):
+                result = await db.run(lambda c: c.table("voters").upsert(chunk, on_conflict="epic_number", ignore_duplicates=True))
+            for row in result.data or []:
+                # The inserted representation is the full row, so later lookups never leave the process
+                cache_voter(row, complete=True)
+                voter_aggregates.add(row)
+                stored[row["epic_number"]] = (row["id"], True)
+        
+        conflicts = [epic_number for epic_number in pending if epic_number not in stored]
+        if conflicts:
+            existing = await find_existing_epics(conflicts)
+            for epic_number in conflicts:
+                if epic_number in existing:
+                    stored[epic_number] = (existing[epic_number], False)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    return stored
+
+# Extractions currently running, keyed by (EPIC number, state code)
+extraction_flights = SingleFlight()
 
 async def extract_single_epic(epic_number: str, state_code: str, job_id: Optional[str] = None) -> Dict[str, Any]:
-    """Extract data for a single EPIC number"""
+    """
+    Extract data for a single EPIC number
+    
+    Concurrent calls for the same EPIC and state (two operators, or a job
+    overlapping a single request) share one ECI extraction and its result.
+    """
+    key = (ingestion.normalize_epic_number(epic_number), state_code)
+    result, shared = await extraction_flights.do(key, lambda: run_epic_extraction(epic_number, state_code))
+    # Every caller gets its own copy of the shared result
+    result = dict(result)
+    if shared:
+        EXTRACTIONS_COALESCED.inc()
+        if result["status"] == "success":
+            # Only the caller that ran the extraction created the voter; for the others it already exists
+            result["status"] = "duplicate"
+            result["message"] = "Voter already exists in database"
+    
+    return result
+
+async def run_epic_extraction(epic_number: str, state_code: str) -> Dict[str, Any]:
+    """Call the ECI portal for one EPIC and save the voter"""
     try:
-        # Call the enhanced detail function that returns actual data
-        status, voter_data, attempts = detail.extract_voter_data(epic_number, state_code)
+        # Call the enhanced detail function that returns actual data (blocking, so run it off the event loop)
+        loop = asyncio.get_running_loop()
+        with VOTER_STAGE_SECONDS.time(stage="eci_extract"):
+            status, voter_data, attempts = await loop.run_in_executor(None, detail.extract_voter_data, epic_number, state_code)
+        EXTRACTION_ATTEMPTS.observe(attempts, result=status)
         
         if status == "success" and voter_data:
             # Parse and save to database
-            parsed_data = parse_eci_response(voter_data)
+            with VOTER_STAGE_SECONDS.time(stage="parse"):
+                parsed_data = parse_eci_response(voter_data)
             
-            try:
-                voter_id = await save_voter_to_db(parsed_data)
+            voter_id, created = await save_voter_to_db(parsed_data)
+            if not created:
                 return {
-                    "status": "success",
+                    "status": "duplicate",
                     "epic_number": epic_number,
-                    "message": "Data extracted and saved successfully",
+                    "message": "Voter already exists in database",
                     "voter_data": voter_data,
                     "voter_id": voter_id,
                     "attempts": attempts
                 }
-            except HTTPException as e:
-                if e.status_code == 409:  # Duplicate
-                    return {
-                        "status": "duplicate",
-                        "epic_number": epic_number,
-                        "message": str(e.detail),
-                        "voter_data": voter_data
-                    }
-                raise
+            
+            return {
+                "status": "success",
+                "epic_number": epic_number,
+                "message": "Data extracted and saved successfully",
+                "voter_data": voter_data,
+                "voter_id": voter_id,
+                "attempts": attempts
+            }
         else:
+            message = f"Failed to extract data after {attempts} attempts"
+            try:
+                await failure_cache.record_failure(epic_number, state_code, message, attempts)
+            except Exception as e:
+                print(f"Recording failure of {epic_number} failed: {str(e)}")
+            
             return {
                 "status": "failed",
                 "epic_number": epic_number,
-                "message": f"Failed to extract data after {attempts} attempts",
+                "message": message,
                 "attempts": attempts
             }
             
@@ -258,8 +621,188 @@ async def extract_single_epic(epic_number: str, state_code: str, job_id: Optiona
             "message": str(e)
         }
 
+class ExtractionLogWriter:
+    """
+    Buffers extraction_logs rows for a job and writes them in multi-row inserts.
+    
+    The caller flushes before each progress write (see JobProgressReporter)
+    and skips the write if the flush failed, so the job's checkpoint never
+    runs ahead of its stored logs and batches follow JOB_PROGRESS_EVERY_N /
+    JOB_PROGRESS_INTERVAL_SECONDS.
+    Use it as an async context manager so the final flush also happens if the
+    job fails.
+    """
+    
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.buffer: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self) -> "ExtractionLogWriter":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def add(self, epic_number: str, status: str, attempts: int = 1, error_message: Optional[str] = None, voter_id: Optional[str] = None):
+        """Queue a log row until the next flush"""
+        row = {
+            "job_id": self.job_id,
+            "voter_id": voter_id,
+            "epic_number": epic_number,
+            "status": status,
+            "attempts": attempts,
+            "error_message": error_message,
+            # Set here rather than by the column default, which would give every row of a multi-row insert the same now()
+            "created_at": datetime.now().isoformat()
+        }
+        self.buffer.append(row)
+        # One log row per processed EPIC, so this doubles as the job records counter
+        JOB_RECORDS.inc(status=status)
+        job_events.publish(self.job_id, "log", dict(row))
+    
+    async def flush(self) -> bool:
+        """Write all pending rows in one insert; returns False if they could not be stored"""
+        async with self._lock:
+            if not self.buffer:
+                return True
+            
+            rows, self.buffer = self.buffer, []
+            try:
+                with VOTER_STAGE_SECONDS.time(stage="log_insert"):
+                    await db.run(lambda c: c.table("extraction_logs").insert(rows))
+            except Exception as e:
+                # Keep the rows so the next flush retries them
+                self.buffer = rows + self.buffer
+                print(f"Failed to flush {len(rows)} extraction logs for job {self.job_id}: {str(e)}")
+                return False
+            return True
+    
+    async def close(self):
+        """Write whatever is left"""
+        await self.flush()
+        if self.buffer:
+            print(f"Dropped {len(self.buffer)} extraction logs for job {self.job_id} after final flush failed")
+            self.buffer = []
+
+class JobProgressReporter:
+    """
+    Coalesces extraction_jobs progress UPDATEs for a running job.
+    
+    record() keeps the latest counters in memory, publishes them to live
+    watchers and reports whether a write is due (every JOB_PROGRESS_EVERY_N
+    records or JOB_PROGRESS_INTERVAL_SECONDS, whichever comes first). write()
+    always sends the current counters, so the final write at completion is exact.
+    processed_records doubles as the job's resume checkpoint.
+    """
+    
+    def __init__(self, job_id: str, total: int, every_n: int = JOB_PROGRESS_EVERY_N, interval: float = JOB_PROGRESS_INTERVAL_SECONDS):
+        self.job_id = job_id
+        self.total = total
+        self.every_n = max(1, every_n)
+        self.interval = interval
+        self.counters: Dict[str, int] = {}
+        self.pending = 0
+        self.last_write = time.monotonic()
+    
+    def seed(self, processed: int, successful: int, failed: int, duplicates: int):
+        """Set the starting counters (fresh or resumed job) without counting a record"""
+        self.counters = {
+            "processed_records": processed,
+            "successful_records": successful,
+            "failed_records": failed,
+            "duplicate_records": duplicates
+        }
+        job_events.publish(self.job_id, "progress", self.event())
+    
+    def record(self, processed: int, successful: int, failed: int, duplicates: int) -> bool:
+        """Update the in-memory counters and return True if a write is due"""
+        self.seed(processed, successful, failed, duplicates)
+        self.pending += 1
+        return self.pending >= self.every_n or time.monotonic() - self.last_write >= self.interval
+    
+    def event(self) -> Dict[str, Any]:
+        """Current counters as a live progress event"""
+        processed = self.counters.get("processed_records", 0)
+        return dict(
+            self.counters,
+            job_id=self.job_id,
+            total_records=self.total,
+            progress_percentage=round(processed / self.total * 100, 2) if self.total else 0
+        )
+    
+    async def write(self, extra: Optional[Dict[str, Any]] = None, only_if_running: bool = True) -> bool:
+        """
+        Write the current counters (plus any extra job fields) to extraction_jobs
+        
+        With only_if_running the row is only updated while the job is still
+        in_progress; returns False if it was cancelled in the meantime.
+        """
+        update = dict(self.counters)
+        update["progress_updated_at"] = datetime.now().isoformat()
+        if extra:
+            update.update(extra)
+        
+        def build_query(c):
+            query = c.table("extraction_jobs").update(update).eq("id", self.job_id)
+            return query.eq("status", "in_progress") if only_if_running else query
+        
+        with VOTER_STAGE_SECONDS.time(stage="progress_update"):
+            result = await db.run(build_query)
+        self.pending = 0
+        self.last_write = time.monotonic()
+        return bool(result.data)
+
 # API Routes
 
+# Long-running background loops started with the app (references kept so they are not garbage collected)
+background_tasks_running: set = set()
+
+def start_background_task(coro) -> asyncio.Task:
+    """Run a coroutine for the lifetime of the worker"""
+    task = asyncio.create_task(coro)
+    background_tasks_running.add(task)
+    task.add_done_callback(background_tasks_running.discard)
+    return task
+
+@app.on_event("startup")
+async def log_startup_time():
+    """Log where startup time went, then warm heavy dependencies without delaying the first response"""
+    startup_timer.mark("server start")
+    print(f"Startup: {startup_timer.report()}")
+    if WARM_UP_ON_STARTUP:
+        start_background_task(warm_up_dependencies())
+
+@app.on_event("startup")
+async def start_aggregate_reconciliation():
+    """Build the in-process voter aggregates and keep them reconciled with the database"""
+    start_background_task(voter_aggregates.reconcile_periodically())
+
+@app.on_event("startup")
+async def start_health_prober():
+    """Probe the database and ECI portal in the background so /health never waits on them"""
+    start_background_task(health_prober.probe_periodically())
+
+@app.on_event("startup")
+async def start_job_recovery():
+    """Resume extraction jobs interrupted by a redeploy or crash"""
+    start_background_task(resume_interrupted_jobs_periodically())
+
+@app.on_event("shutdown")
+async def checkpoint_running_jobs():
+    """Stop running jobs at an exact checkpoint so the next worker resumes them without repeating work"""
+    if not running_jobs:
+        return
+    
+    for job_id in running_jobs:
+        stop_requests[job_id] = "interrupted"
+    await asyncio.wait(list(running_jobs.values()), timeout=JOB_SHUTDOWN_GRACE_SECONDS)
+
+@app.on_event("shutdown")
+async def shutdown_database():
+    """Let in-flight database queries finish before the worker exits"""
+    db.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -269,55 +812,70 @@ async def root():
         "version": "1.0.0"
     }
 
+async def check_database() -> str:
+    """Health check: one tiny query against the voters table"""
+    await db.run(lambda c: c.table("voters").select("id").limit(1))
+    return "healthy"
+
+async def check_eci_portal() -> str:
+    """Health check: simple connectivity test against the ECI captcha service"""
+    import requests
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(None, lambda: requests.get(detail.urltogetcaptcha, timeout=HEALTH_CHECK_TIMEOUT_SECONDS))
+    return "healthy" if response.status_code == 200 else "degraded"
+
+health_prober = HealthProber({
+    "database": check_database,
+    "eci_portal": check_eci_portal
+})
+
 @app.get("/health")
 async def health_check():
-    """Comprehensive health check"""
+    """Comprehensive health check, served from the background prober's latest snapshot"""
+    snapshot = health_prober.snapshot()
+    checks = snapshot["checks"]
+    
     health_status = {
         "api": "healthy",
-        "database": "unknown",
-        "eci_portal": "unknown",
+        "database": checks["database"]["status"],
+        "eci_portal": checks["eci_portal"]["status"],
         "timestamp": datetime.now().isoformat()
     }
     
-    # Check database connection
-    try:
-        result = supabase.table("voters").select("id").limit(1).execute()
-        health_status["database"] = "healthy"
-    except Exception as e:
-        health_status["database"] = "unhealthy"
-        health_status["database_error"] = str(e)
-    
-    # Check ECI portal (simple connectivity test)
-    try:
-        import requests
-        response = requests.get("https://gateway-voters.eci.gov.in/api/v1/captcha-service/generateCaptcha", timeout=5)
-        if response.status_code == 200:
-            health_status["eci_portal"] = "healthy"
-        else:
-            health_status["eci_portal"] = "degraded"
-    except Exception as e:
-        health_status["eci_portal"] = "unhealthy"
-        health_status["eci_error"] = str(e)
+    if checks["database"]["error"]:
+        health_status["database_error"] = checks["database"]["error"]
+    if checks["eci_portal"]["error"]:
+        health_status["eci_error"] = checks["eci_portal"]["error"]
     
     # Overall status
-    if health_status["database"] == "healthy" and health_status["api"] == "healthy":
+    if health_status["database"] == "healthy" and health_status["api"] == "healthy" and not snapshot["stale"]:
         health_status["overall"] = "healthy"
     elif health_status["database"] == "unhealthy":
         health_status["overall"] = "critical"
     else:
         health_status["overall"] = "degraded"
     
+    health_status.update(snapshot)
     return health_status
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe - answers as long as the event loop is running, without touching any dependency"""
+    return {"status": "alive"}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics of this worker: route and per-voter stage latencies, Supabase calls, job throughput, ECI attempts"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/api/extract/single", response_model=ExtractionResponse)
 async def extract_single(request: EPICRequest):
     """Extract data for a single EPIC number"""
     
     # Check if voter already exists
-    existing = supabase.table("voters").select("id, full_name, full_name_l1, age, gender, part_name, district_value, created_at").eq("epic_number", request.epic_number).execute()
+    voter = await lookup_voter(request.epic_number, VOTER_SUMMARY_COLUMNS)
     
-    if existing.data:
-        voter = existing.data[0]
+    if voter:
         return ExtractionResponse(
             status="duplicate",
             message=f"Voter already exists in database",
@@ -325,9 +883,21 @@ async def extract_single(request: EPICRequest):
             voter_id=voter["id"]
         )
     
+    # Skip EPICs the ECI portal failed to return recently, unless forced
+    failure = await failure_cache.find_failure(request.epic_number, request.state_code)
+    
+    if failure and failure_cache.is_active(failure) and not request.force:
+        return ExtractionResponse(
+            status="recently_failed",
+            message=failure_cache.describe(failure)
+        )
+    
     # Extract data
     result = await extract_single_epic(request.epic_number, request.state_code)
     
+    if failure and result["status"] in ("success", "duplicate"):
+        await failure_cache.clear_failure(request.epic_number, request.state_code)
+    
     return ExtractionResponse(
         status=result["status"],
         message=result["message"],
@@ -335,75 +905,80 @@ async def extract_single(request: EPICRequest):
         voter_id=result.get("voter_id")
     )
 
+def no_valid_epics_message(validation: Dict[str, Any]) -> str:
+    """400 detail when every submitted value was blank or failed EPIC validation"""
+    examples = ", ".join(validation["rejected_values"][:5])
+    message = f"No valid EPIC numbers found ({validation['rejected']} rejected, {validation['blank']} blank)"
+    return f"{message}, e.g. {examples}" if examples else message
+
 @app.post("/api/extract/bulk")
-async def extract_bulk(request: BulkEPICRequest, background_tasks: BackgroundTasks):
+async def extract_bulk(request: BulkEPICRequest):
     """Extract data for multiple EPIC numbers"""
     
+    # Normalize, validate and de-duplicate before anything is stored
+    loop = asyncio.get_running_loop()
+    epic_numbers, validation = await loop.run_in_executor(None, ingestion.clean_epic_numbers, request.epic_numbers)
+    
+    if not epic_numbers:
+        raise HTTPException(status_code=400, detail=no_valid_epics_message(validation))
+    
     # Create extraction job
     job_id = str(uuid.uuid4())
     job_data = {
         "id": job_id,
-        "job_name": f"Bulk extraction - {len(request.epic_numbers)} EPICs",
+        "job_name": f"Bulk extraction - {len(epic_numbers)} EPICs",
         "job_type": "bulk_epic",
         "status": "pending",
-        "total_records": len(request.epic_numbers),
+        "total_records": len(epic_numbers),
         "processed_records": 0,
         "successful_records": 0,
         "failed_records": 0,
-        "duplicate_records": 0
+        "duplicate_records": 0,
+        # Stored so the job can be resumed after a restart
+        "input_epics": epic_numbers,
+        "state_code": request.state_code,
+        "force_retry": request.force
     }
     
-    supabase.table("extraction_jobs").insert(job_data).execute()
+    await db.run(lambda c: c.table("extraction_jobs").insert(job_data))
     
-    # Add background task
-    background_tasks.add_task(process_bulk_extraction, job_id, request.epic_numbers, request.state_code)
+    start_job(job_id, epic_numbers, request.state_code, force=request.force)
     
     return {
         "status": "accepted",
         "message": "Bulk extraction job created",
-        "job_id": job_id
+        "job_id": job_id,
+        "total_records": len(epic_numbers),
+        "validation": validation
     }
 
 @app.post("/api/extract/excel")
 async def extract_from_excel(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    epic_column: str = Form("epic_number")
+    epic_column: str = Form("epic_number"),
+    force: bool = Form(False)
 ):
     """Extract data from Excel file containing EPIC numbers"""
     
     if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
         raise HTTPException(status_code=400, detail="Invalid file format. Only Excel (.xlsx, .xls) or CSV files are supported")
     
-    # Read file
-    contents = await file.read()
+    loop = asyncio.get_running_loop()
+    
+    # Spool the upload to disk and parse it in one streaming pass, off the event loop
+    path, file_size = await loop.run_in_executor(None, ingestion.spool_to_disk, file.file, file.filename)
     
     try:
-        if file.filename.endswith('.csv'):
-            # First try reading with header
-            df = pd.read_csv(io.BytesIO(contents))
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
+        values = await loop.run_in_executor(None, ingestion.read_epic_numbers, path, file.filename, epic_column)
         
-        # Check if the specified column exists
-        if epic_column in df.columns:
-            epic_numbers = df[epic_column].dropna().astype(str).tolist()
-        else:
-            # If column not found, assume first column contains EPIC numbers (no header)
-            # Re-read without header
-            if file.filename.endswith('.csv'):
-                df = pd.read_csv(io.BytesIO(contents), header=None)
-            else:
-                df = pd.read_excel(io.BytesIO(contents), header=None)
-            
-            # Take first column
-            epic_numbers = df.iloc[:, 0].dropna().astype(str).tolist()
-            
-            # Filter out any non-EPIC looking values (in case first row was a header)
-            epic_numbers = [e for e in epic_numbers if len(e) > 5 and not e.lower() in ['epic', 'epic_number', 'epic number', 'epic no']]
+        if not values:
+            raise HTTPException(status_code=400, detail="No EPIC numbers found in file")
+        
+        # Normalize, validate and de-duplicate before the job row is created
+        epic_numbers, validation = await loop.run_in_executor(None, ingestion.clean_epic_numbers, values)
         
         if not epic_numbers:
-            raise HTTPException(status_code=400, detail="No EPIC numbers found in file")
+            raise HTTPException(status_code=400, detail=no_valid_epics_message(validation))
         
         # Create extraction job
         job_id = str(uuid.uuid4())
@@ -413,34 +988,42 @@ async def extract_from_excel(
             "job_type": "excel_upload",
             "status": "pending",
             "file_name": file.filename,
-            "file_size": len(contents),
+            "file_size": file_size,
             "total_records": len(epic_numbers),
             "processed_records": 0,
             "successful_records": 0,
             "failed_records": 0,
-            "duplicate_records": 0
+            "duplicate_records": 0,
+            # Stored so the job can be resumed after a restart
+            "input_epics": epic_numbers,
+            "state_code": "S08",
+            "force_retry": force
         }
         
-        supabase.table("extraction_jobs").insert(job_data).execute()
+        await db.run(lambda c: c.table("extraction_jobs").insert(job_data))
         
-        # Add background task
-        background_tasks.add_task(process_bulk_extraction, job_id, epic_numbers, "S08")
+        start_job(job_id, epic_numbers, "S08", force=force)
         
         return {
             "status": "accepted",
             "message": f"File uploaded successfully. Processing {len(epic_numbers)} EPIC numbers",
             "job_id": job_id,
-            "total_records": len(epic_numbers)
+            "total_records": len(epic_numbers),
+            "validation": validation
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    finally:
+        os.remove(path)
 
 @app.get("/api/jobs/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str):
     """Get status of an extraction job"""
     
-    result = supabase.table("extraction_jobs").select("*").eq("id", job_id).execute()
+    result = await db.run(lambda c: c.table("extraction_jobs").select(",".join(JOB_COLUMNS)).eq("id", job_id))
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -458,14 +1041,158 @@ async def get_job_status(job_id: str):
         processed_records=job["processed_records"],
         successful_records=job["successful_records"],
         failed_records=job["failed_records"],
-        duplicate_records=job["duplicate_records"]
+        duplicate_records=job["duplicate_records"],
+        last_progress_at=job.get("progress_updated_at")
     )
 
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Stop a pending or running job after the EPIC in progress (it can be resumed later)"""
+    
+    result = await db.run(lambda c: c.table("extraction_jobs").update({
+        "status": "cancelled",
+        "completed_at": datetime.now().isoformat()
+    }).eq("id", job_id).in_("status", ["pending", "in_progress"]))
+    
+    if not result.data:
+        existing = await db.run(lambda c: c.table("extraction_jobs").select("status").eq("id", job_id))
+        if not existing.data:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail=f"Job is already {existing.data[0]['status']}")
+    
+    # A job running in this worker stops before its next EPIC; one running elsewhere at its next progress write
+    if job_id in running_jobs:
+        stop_requests[job_id] = "cancelled"
+    
+    return {
+        "status": "cancelled",
+        "job_id": job_id,
+        "processed_records": result.data[0]["processed_records"]
+    }
+
+@app.post("/api/jobs/{job_id}/resume")
+async def resume_job_endpoint(job_id: str):
+    """Continue a cancelled, failed or interrupted job from its checkpoint"""
+    
+    if job_id in running_jobs:
+        raise HTTPException(status_code=409, detail="Job is already running")
+    
+    # Cancelled and failed jobs can be taken over at once; unfinished ones only once their worker is gone
+    job = await claim_job(job_id, ["cancelled", "failed"], stale_only=False)
+    if job is None:
+        job = await claim_job(job_id, ["pending", "in_progress"], stale_only=True)
+    
+    if job is None:
+        existing = await db.run(lambda c: c.table("extraction_jobs").select("status").eq("id", job_id))
+        if not existing.data:
+            raise HTTPException(status_code=404, detail="Job not found")
+        status = existing.data[0]["status"]
+        if status == "completed":
+            raise HTTPException(status_code=409, detail="Job is already completed")
+        raise HTTPException(status_code=409, detail="Job is still running in another worker")
+    
+    await resume_job(job)
+    if job.get("input_epics") is None:
+        raise HTTPException(status_code=409, detail="Job has no stored input to resume from, upload the file again")
+    
+    return {
+        "status": "resumed",
+        "job_id": job_id,
+        "processed_records": job.get("processed_records") or 0,
+        "total_records": job["total_records"]
+    }
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job's progress counters and new log entries
+    
+    Events come straight from the worker running the job, so watchers cost no
+    database reads. Only a job that is not running in this worker is read
+    once, to report its current state; the stream ends with a "completed" event.
+    """
+    queue = job_events.subscribe(job_id)
+    
+    async def event_stream():
+        try:
+            latest = job_events.latest(job_id)
+            if latest is not None:
+                yield format_sse(latest["event"], latest["data"])
+            elif queue.empty():
+                # Not running here - report the stored state once
+                result = await db.run(lambda c: c.table("extraction_jobs").select(
+                    "id, status, total_records, processed_records, successful_records, failed_records, duplicate_records"
+                ).eq("id", job_id))
+                if not result.data:
+                    yield format_sse("error", {"job_id": job_id, "message": "Job not found"})
+                    return
+                
+                job = result.data[0]
+                event = JOB_FINISHED_EVENT if job["status"] in TERMINAL_JOB_STATUSES else "progress"
+                yield format_sse(event, dict(job, job_id=job.pop("id")))
+                if event == JOB_FINISHED_EVENT:
+                    return
+            
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                yield format_sse(message["event"], message["data"])
+                if message["event"] == JOB_FINISHED_EVENT:
+                    return
+        finally:
+            job_events.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Voter columns embedded in job log entries, mapped to the camelCase keys the dashboard reads
+JOB_LOG_VOTER_FIELDS = {
+    "fullName": "full_name",
+    "fullNameL1": "full_name_l1",
+    "age": "age",
+    "gender": "gender",
+    "relationType": "relation_type",
+    "relativeFullName": "relative_full_name",
+    "relativeFullNameL1": "relative_full_name_l1",
+    "partNumber": "part_number",
+    "partName": "part_name",
+    "acNumber": "ac_number",
+    "asmblyName": "asmbly_name",
+    "districtValue": "district_value",
+    "stateName": "state_name",
+    "psbuildingName": "ps_building_name",
+    "psRoomDetails": "ps_room_details"
+}
+
+JOB_LOG_SELECT = "id, epic_number, status, attempts, error_message, created_at, voters(" + ",".join(JOB_LOG_VOTER_FIELDS.values()) + ")"
+
 @app.get("/api/jobs/{job_id}/logs")
-async def get_job_logs(job_id: str, limit: int = 20):
-    """Get recent extraction logs for a job with full voter details"""
+async def get_job_logs(job_id: str, limit: int = 20, status: Optional[str] = None, cursor: Optional[str] = None):
+    """
+    Get extraction logs for a job, newest first, with the voter fields the dashboard shows
+    
+    status filters to one outcome (e.g. failed). Pass next_cursor back as
+    cursor for the next page. status_counts covers the whole job.
+    """
+    after = decode_cursor(cursor, ["created_at", "id"]) if cursor else None
     
-    result = supabase.table("extraction_logs").select("*, voters(*)").eq("job_id", job_id).order("created_at", desc=True).limit(limit).execute()
+    def build_query(c):
+        query = apply_created_keyset(c.table("extraction_logs").select(JOB_LOG_SELECT).eq("job_id", job_id), after).limit(limit)
+        if status:
+            query = query.eq("status", status)
+        return query
+    
+    result, counts = await asyncio.gather(
+        db.run(build_query),
+        db.run(lambda c: c.rpc("job_log_status_counts", {"p_job_id": job_id}))
+    )
     
     extractions = []
     for log in result.data or []:
@@ -476,166 +1203,506 @@ async def get_job_logs(job_id: str, limit: int = 20):
             "created_at": log["created_at"]
         }
         
-        # Add complete voter data if available
+        if log.get("error_message"):
+            extraction["error_message"] = log["error_message"]
+        
+        # Add voter data if available
         if log.get("voters"):
             voter = log["voters"]
-            extraction["voter_data"] = {
-                "fullName": voter.get("full_name"),
-                "fullNameL1": voter.get("full_name_l1"),
-                "age": voter.get("age"),
-                "gender": voter.get("gender"),
-                "relationType": voter.get("relation_type"),
-                "relativeFullName": voter.get("relative_full_name"),
-                "relativeFullNameL1": voter.get("relative_full_name_l1"),
-                "partNumber": voter.get("part_number"),
-                "partName": voter.get("part_name"),
-                "acNumber": voter.get("ac_number"),
-                "asmblyName": voter.get("asmbly_name"),
-                "districtValue": voter.get("district_value"),
-                "stateName": voter.get("state_name"),
-                "psbuildingName": voter.get("psbuilding_name"),
-                "psRoomDetails": voter.get("ps_room_details")
-            }
+            extraction["voter_data"] = {key: voter.get(column) for key, column in JOB_LOG_VOTER_FIELDS.items()}
         
         extractions.append(extraction)
     
-    return {"extractions": extractions}
+    return FastJSONResponse({
+        "extractions": extractions,
+        "next_cursor": next_created_cursor(result.data or [], limit),
+        "status_counts": {row["status"]: row["count"] for row in counts.data or []}
+    })
 
 @app.get("/api/jobs")
-async def list_jobs(limit: int = 10, status: Optional[str] = None):
-    """List all extraction jobs"""
+async def list_jobs(limit: int = 10, status: Optional[str] = None, cursor: Optional[str] = None):
+    """List all extraction jobs, newest first (pass next_cursor back as cursor for the next page)"""
     
-    query = supabase.table("extraction_jobs").select("*").order("created_at", desc=True).limit(limit)
+    after = decode_cursor(cursor, ["created_at", "id"]) if cursor else None
     
-    if status:
-        query = query.eq("status", status)
+    def build_query(c):
+        query = apply_created_keyset(c.table("extraction_jobs").select(",".join(JOB_COLUMNS)), after).limit(limit)
+        if status:
+            query = query.eq("status", status)
+        return query
     
-    result = query.execute()
+    result = await db.run(build_query)
     
-    return {
+    return FastJSONResponse({
         "jobs": result.data,
-        "count": len(result.data)
-    }
+        "count": len(result.data),
+        "next_cursor": next_created_cursor(result.data, limit)
+    })
 
 @app.get("/api/voters/search")
 async def search_voters(
     query: Optional[str] = None,
     epic_number: Optional[str] = None,
+    part_number: Optional[int] = None,
+    ac_number: Optional[int] = None,
     limit: int = 20,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    refresh: bool = False,
+    format: str = "rows"
 ):
-    """Search voters by name or EPIC number"""
+    """
+    Search voters by name or EPIC number
+    
+    Name queries are ranked best match first (see search_voters_by_name).
+    Pages continue from next_cursor when it is passed back as cursor;
+    offset is still honoured when no cursor is given.
+    fields picks the columns returned: summary (default), full, raw or a
+    comma-separated column list.
+    refresh=true bypasses the EPIC lookup cache.
+    format=columnar returns voters as one array per field.
+    """
+    columns = resolve_voter_fields(fields)
+    check_listing_format(format)
+    next_cursor = None
     
     if epic_number:
-        result = supabase.table("voters").select("*").eq("epic_number", epic_number).execute()
+        if refresh:
+            voter_cache.invalidate(epic_number)
+        voter = await lookup_voter(epic_number, columns)
+        voters = [voter] if voter else []
     elif query:
-        result = supabase.table("voters").select("*").ilike("full_name", f"%{query}%").limit(limit).offset(offset).execute()
+        after = decode_cursor(cursor, ["rank", "id"]) if cursor else None
+        voters = await search_voters_by_name(query.strip(), part_number, ac_number, limit, offset, after, columns)
+        if len(voters) == limit:
+            next_cursor = encode_cursor({"rank": voters[-1]["search_rank"], "id": voters[-1]["id"]})
     else:
-        result = supabase.table("voters").select("*").limit(limit).offset(offset).execute()
+        after = decode_cursor(cursor, ["created_at", "id"]) if cursor else None
+        
+        def build_query(c):
+            voters_query = c.table("voters").select(select_columns(columns))
+            if part_number is not None:
+                voters_query = voters_query.eq("part_number", part_number)
+            if ac_number is not None:
+                voters_query = voters_query.eq("ac_number", ac_number)
+            voters_query = apply_created_keyset(voters_query, after).limit(limit)
+            return voters_query if after else voters_query.offset(offset)
+        
+        result = await db.run(build_query)
+        voters = result.data
+        next_cursor = next_created_cursor(voters, limit)
+    
+    return FastJSONResponse({
+        "voters": format_voter_listing(voters, format),
+        "count": len(voters),
+        "next_cursor": next_cursor
+    })
+
+@app.post("/api/voters/lookup")
+async def lookup_voters(request: VoterLookupRequest):
+    """
+    Fetch stored voters for many EPIC numbers in one call
+    
+    EPICs are normalized as on upload (ingestion.normalize_epic_number); voters come back in input order,
+    followed by the EPICs that are not stored. fields works as on
+    /api/voters/search (epic_number is always included), as does format.
+    """
+    normalized = (ingestion.normalize_epic_number(e) for e in request.epic_numbers)
+    epic_numbers = list(dict.fromkeys(e for e in normalized if e))
+    
+    if len(epic_numbers) > VOTER_LOOKUP_MAX_EPICS:
+        raise HTTPException(status_code=400, detail=f"At most {VOTER_LOOKUP_MAX_EPICS} EPIC numbers per lookup (got {len(epic_numbers)})")
     
+    columns = resolve_voter_fields(request.fields)
+    check_listing_format(request.format)
+    
+    found = await find_voters(epic_numbers, columns)
+    voters = [found[epic_number] for epic_number in epic_numbers if epic_number in found]
+    
+    return FastJSONResponse({
+        "voters": format_voter_listing(voters, request.format),
+        "missing": [epic_number for epic_number in epic_numbers if epic_number not in found],
+        "requested": len(epic_numbers),
+        "found": len(found)
+    })
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters and size of the in-process voter lookup cache, plus extraction coalescing counters"""
     return {
-        "voters": result.data,
-        "count": len(result.data)
+        "voters": voter_cache.stats(),
+        "extractions": extraction_flights.stats(),
+        "timestamp": datetime.now().isoformat()
     }
 
+async def load_demographic_stats() -> Dict[str, Any]:
+    result = await db.run(lambda c: c.table("demographic_stats").select("*"))
+    return result.data[0] if result.data else {}
+
+async def load_ward_wise_analysis() -> List[Dict[str, Any]]:
+    result = await db.run(lambda c: c.table("ward_wise_analysis").select("*"))
+    return result.data
+
+demographics_cache = StaleWhileRevalidateCache(load_demographic_stats, ANALYTICS_CACHE_TTL_SECONDS, ANALYTICS_CACHE_MAX_STALE_SECONDS)
+ward_wise_cache = StaleWhileRevalidateCache(load_ward_wise_analysis, ANALYTICS_CACHE_TTL_SECONDS, ANALYTICS_CACHE_MAX_STALE_SECONDS)
+
+def invalidate_analytics():
+    """Drop cached analytics so the next request recomputes them (called when a job completes)"""
+    demographics_cache.invalidate()
+    ward_wise_cache.invalidate()
+
+@app.get("/api/voters/export")
+async def export_voters(
+    format: str = "csv",
+    job_id: Optional[str] = None,
+    part_number: Optional[int] = None,
+    ac_number: Optional[int] = None,
+    district: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """
+    Stream voters as CSV, XLSX or Parquet
+    
+    Rows are fetched in batches and written as they arrive, so memory stays
+    bounded for any export size. fields works as in /api/voters/search but
+    defaults to the full preset.
+    """
+    if format not in EXPORT_WRITERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_WRITERS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires the pyarrow package")
+    
+    columns = resolve_voter_fields(fields or "full")
+    batches = iter_voter_batches(columns, job_id, part_number, ac_number, district)
+    filename = f"voters-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}"
+    
+    return StreamingResponse(
+        EXPORT_WRITERS[format](batches, columns),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/api/analytics/overview")
 async def get_analytics_overview():
-    """Get overall analytics overview"""
+    """Get overall analytics overview (cached, see ANALYTICS_CACHE_TTL_SECONDS)"""
     
     # Get demographic stats from view
-    result = supabase.table("demographic_stats").select("*").execute()
+    demographics, computed_at = await demographics_cache.get()
     
     return {
-        "demographics": result.data[0] if result.data else {},
+        "demographics": demographics,
+        "computed_at": computed_at.isoformat(),
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/analytics/live")
+async def get_live_analytics():
+    """Demographic counts maintained in process - O(1) regardless of table size"""
+    return voter_aggregates.snapshot()
+
 @app.get("/api/analytics/ward-wise")
 async def get_ward_wise_analytics():
-    """Get ward-wise analytics"""
+    """Get ward-wise analytics (cached, see ANALYTICS_CACHE_TTL_SECONDS)"""
     
-    result = supabase.table("ward_wise_analysis").select("*").execute()
+    wards, computed_at = await ward_wise_cache.get()
     
     return {
-        "wards": result.data,
-        "total_wards": len(result.data)
+        "wards": wards,
+        "total_wards": len(wards),
+        "computed_at": computed_at.isoformat()
     }
 
 # Background task functions
-async def process_bulk_extraction(job_id: str, epic_numbers: List[str], state_code: str):
-    """Process bulk extraction in background"""
+
+async def warm_up_dependencies():
+    """Load the lazily imported dependencies in the background once the server accepts connections"""
+    loop = asyncio.get_running_loop()
+    timings = []
+    for name, warm_up in (
+        ("captcha model", lambda: loop.run_in_executor(None, detail.get_ocr)),
+        ("pandas", lambda: loop.run_in_executor(None, ingestion.warm_up)),
+        ("supabase client", db.warm_up)
+    ):
+        started = time.perf_counter()
+        try:
+            await warm_up()
+            timings.append(f"{name} {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            timings.append(f"{name} failed ({str(e)})")
+    print(f"Warm-up: {', '.join(timings)}")
+
+# Extraction jobs running in this worker, and jobs asked to stop before their next EPIC
+# (mapped to the reason reported to live watchers: cancelled or interrupted)
+running_jobs: Dict[str, asyncio.Task] = {}
+stop_requests: Dict[str, str] = {}
+
+def start_job(job_id: str, epic_numbers: List[str], state_code: str, checkpoint: Optional[Dict[str, Any]] = None, force: bool = False) -> asyncio.Task:
+    """Run process_bulk_extraction for a job and track it until it finishes"""
+    task = asyncio.create_task(process_bulk_extraction(job_id, epic_numbers, state_code, checkpoint, force))
+    heartbeat = asyncio.create_task(heartbeat_job(job_id))
+    running_jobs[job_id] = task
+    JOBS_RUNNING.inc()
     
-    # Update job status to in_progress
-    supabase.table("extraction_jobs").update({
-        "status": "in_progress",
-        "started_at": datetime.now().isoformat()
-    }).eq("id", job_id).execute()
+    def finished(task: asyncio.Task):
+        heartbeat.cancel()
+        JOBS_RUNNING.dec()
+        running_jobs.pop(job_id, None)
+        stop_requests.pop(job_id, None)
+        error = "Job task cancelled" if task.cancelled() else task.exception()
+        if error is not None:
+            # The job stays in_progress and is resumed once its progress goes stale
+            print(f"Job {job_id} stopped: {str(error)}")
+            # process_bulk_extraction never got to its own final event - end live streams here
+            latest = job_events.latest(job_id)
+            data = dict(latest["data"]) if latest else {"job_id": job_id}
+            job_events.publish(job_id, JOB_FINISHED_EVENT, dict(data, status="interrupted", error=str(error)))
     
-    successful = 0
-    failed = 0
-    duplicates = 0
-    failed_epics = []
+    task.add_done_callback(finished)
+    return task
+
+async def heartbeat_job(job_id: str, interval: float = JOB_HEARTBEAT_INTERVAL_SECONDS):
+    """
+    Bump a running job's progress_updated_at every interval seconds
     
-    for i, epic_number in enumerate(epic_numbers):
+    Progress is only written after a record finishes, and one EPIC can take
+    longer than JOB_RESUME_STALE_SECONDS with retries; without this another
+    worker could claim a job that is still running here.
+    """
+    while True:
+        await asyncio.sleep(interval)
         try:
-            # Check for duplicate
-            existing = supabase.table("voters").select("id").eq("epic_number", epic_number).execute()
+            await db.run(lambda c: c.table("extraction_jobs").update({
+                "progress_updated_at": datetime.now().isoformat()
+            }).eq("id", job_id).eq("status", "in_progress"))
+        except Exception as e:
+            print(f"Job {job_id} heartbeat failed: {str(e)}")
+
+def stale_job_filter() -> str:
+    """PostgREST or-filter matching jobs whose progress has not moved for JOB_RESUME_STALE_SECONDS"""
+    cutoff = (datetime.now() - timedelta(seconds=JOB_RESUME_STALE_SECONDS)).isoformat()
+    return f'progress_updated_at.lt."{cutoff}",and(progress_updated_at.is.null,created_at.lt."{cutoff}")'
+
+async def claim_job(job_id: str, statuses: List[str], stale_only: bool) -> Optional[Dict[str, Any]]:
+    """
+    Mark a job in_progress for this worker and return its full row
+    
+    The UPDATE is conditional (status, and staleness if stale_only), so when
+    several workers try to take over the same job only one gets the row back.
+    """
+    def build_query(c):
+        query = c.table("extraction_jobs").update({
+            "status": "in_progress",
+            "completed_at": None,
+            "progress_updated_at": datetime.now().isoformat()
+        }).eq("id", job_id).in_("status", statuses)
+        return query.or_(stale_job_filter()) if stale_only else query
+    
+    result = await db.run(build_query)
+    return result.data[0] if result.data else None
+
+async def load_failed_epics(job_id: str, page_size: int = 1000) -> List[Dict[str, Any]]:
+    """Rebuild a job's failed_epics list from its failed extraction logs"""
+    failed_epics: List[Dict[str, Any]] = []
+    while True:
+        offset = len(failed_epics)
+        result = await db.run(lambda c: c.table("extraction_logs").select("epic_number, error_message")
+            .eq("job_id", job_id).eq("status", "failed").order("created_at").order("id")
+            .range(offset, offset + page_size - 1))
+        rows = result.data or []
+        failed_epics.extend({"epic": row["epic_number"], "reason": row["error_message"]} for row in rows)
+        if len(rows) < page_size:
+            return failed_epics
+
+async def resume_job(job: Dict[str, Any]):
+    """Continue a claimed job from its checkpoint, or fail it if its input was never stored"""
+    if job.get("input_epics") is None:
+        # Created before job inputs were persisted - nothing to resume from
+        await db.run(lambda c: c.table("extraction_jobs").update({
+            "status": "failed",
+            "completed_at": datetime.now().isoformat()
+        }).eq("id", job["id"]))
+        print(f"Job {job['id']} was interrupted and has no stored input to resume from")
+        return
+    
+    print(f"Resuming job {job['id']} at {job.get('processed_records') or 0}/{job['total_records']}")
+    # failed_epics is only written at completion; the logs up to the checkpoint hold the same list
+    job["failed_epics"] = await load_failed_epics(job["id"])
+    start_job(job["id"], job["input_epics"], job.get("state_code") or "S08", checkpoint=job, force=bool(job.get("force_retry")))
+
+async def resume_interrupted_jobs():
+    """Take over unfinished jobs whose worker went away (redeploy, crash)"""
+    result = await db.run(lambda c: c.table("extraction_jobs").select("id")
+        .in_("status", ["pending", "in_progress"]).or_(stale_job_filter()))
+    
+    for row in result.data or []:
+        if row["id"] in running_jobs:
+            continue
+        job = await claim_job(row["id"], ["pending", "in_progress"], stale_only=True)
+        if job:
+            await resume_job(job)
+
+async def resume_interrupted_jobs_periodically(interval: float = JOB_RESUME_SCAN_INTERVAL_SECONDS):
+    """Background loop: resume interrupted jobs now, then every interval seconds"""
+    while True:
+        try:
+            await resume_interrupted_jobs()
+        except Exception as e:
+            print(f"Resuming interrupted jobs failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+async def process_bulk_extraction(job_id: str, epic_numbers: List[str], state_code: str, checkpoint: Optional[Dict[str, Any]] = None, force: bool = False):
+    """
+    Process bulk extraction in background
+    
+    EPICs are handled in input order, so processed_records is also the
+    position reached in epic_numbers. Before the first record the input is
+    reordered with already-stored EPICs first (order_stored_first) and stored
+    with the first progress write; that leading run of duplicates is
+    written as one progress update as soon as it is logged. A resumed job passes its stored row as
+    checkpoint and continues from there; EPICs stored after the last progress
+    write are found by the duplicate pre-check instead of being extracted again.
+    EPICs that failed recently are counted as failed without calling the ECI
+    portal, unless force is set.
+    """
+    checkpoint = checkpoint or {}
+    start = checkpoint.get("processed_records") or 0
+    successful = checkpoint.get("successful_records") or 0
+    failed = checkpoint.get("failed_records") or 0
+    duplicates = checkpoint.get("duplicate_records") or 0
+    processed = start
+    failed_epics = list(checkpoint.get("failed_epics") or [])
+    run_started = time.monotonic()
+    
+    if not checkpoint:
+        # Update job status to in_progress
+        await db.run(lambda c: c.table("extraction_jobs").update({
+            "status": "in_progress",
+            "started_at": datetime.now().isoformat(),
+            "progress_updated_at": datetime.now().isoformat()
+        }).eq("id", job_id))
+    
+    remaining = epic_numbers[start:]
+    
+    # Resolve duplicates up front in chunked queries instead of one lookup per EPIC
+    existing_epics = await find_existing_epics(remaining)
+    
+    # Job fields sent with the next progress write
+    input_update: Dict[str, Any] = {}
+    if start == 0:
+        # Nothing is checkpointed yet, so the order can still change; stored with the first write
+        epic_numbers = order_stored_first(epic_numbers, existing_epics)
+        remaining = epic_numbers
+        input_update = {"input_epics": epic_numbers}
+    
+    recent_failures = await failure_cache.find_failures([epic for epic in remaining if epic not in existing_epics], state_code)
+    
+    # Position just after the leading run of already-stored EPICs
+    duplicates_end = start
+    while duplicates_end < len(epic_numbers) and epic_numbers[duplicates_end] in existing_epics:
+        duplicates_end += 1
+    
+    progress = JobProgressReporter(job_id, len(epic_numbers))
+    progress.seed(processed, successful, failed, duplicates)
+    
+    # EPICs already handled in this job, mapped to their voter id once stored
+    seen_epics: Dict[str, Optional[str]] = {epic_number: None for epic_number in epic_numbers[:start]}
+    stopped: Optional[str] = None
+    
+    async with ExtractionLogWriter(job_id) as logs:
+        for epic_number in remaining:
+            if job_id in stop_requests:
+                stopped = stop_requests[job_id]
+                break
             
-            if existing.data:
-                duplicates += 1
-                log_data = {
-                    "job_id": job_id,
-                    "epic_number": epic_number,
-                    "status": "duplicate",
-                    "attempts": 1
-                }
-                supabase.table("extraction_logs").insert(log_data).execute()
-            else:
-                # Extract data
-                result = await extract_single_epic(epic_number, state_code, job_id)
-                
-                if result["status"] == "success":
-                    successful += 1
-                    log_data = {
-                        "job_id": job_id,
-                        "epic_number": epic_number,
-                        "status": "success",
-                        "attempts": 1
-                    }
-                    supabase.table("extraction_logs").insert(log_data).execute()
-                else:
+            try:
+                if epic_number in existing_epics:
+                    duplicates += 1
+                    logs.add(epic_number, "duplicate", voter_id=existing_epics[epic_number])
+                elif epic_number in seen_epics:
+                    # Repeated within the same upload - already handled earlier in this job
+                    duplicates += 1
+                    logs.add(epic_number, "duplicate", voter_id=seen_epics[epic_number])
+                elif not force and epic_number in recent_failures and failure_cache.is_active(recent_failures[epic_number]):
+                    seen_epics[epic_number] = None
+                    reason = failure_cache.describe(recent_failures[epic_number])
                     failed += 1
-                    failed_epics.append({"epic": epic_number, "reason": result["message"]})
-                    log_data = {
-                        "job_id": job_id,
-                        "epic_number": epic_number,
-                        "status": "failed",
-                        "attempts": 1,
-                        "error_message": result["message"]
-                    }
-                    supabase.table("extraction_logs").insert(log_data).execute()
-            
-            # Update progress
-            supabase.table("extraction_jobs").update({
-                "processed_records": i + 1,
-                "successful_records": successful,
-                "failed_records": failed,
-                "duplicate_records": duplicates
-            }).eq("id", job_id).execute()
+                    failed_epics.append({"epic": epic_number, "reason": reason})
+                    logs.add(epic_number, "failed", attempts=0, error_message=reason)
+                else:
+                    seen_epics[epic_number] = None
+                    
+                    # Extract data (stored EPICs were already filtered out above)
+                    result = await extract_single_epic(epic_number, state_code, job_id)
+                    
+                    if epic_number in recent_failures and result["status"] in ("success", "duplicate"):
+                        await failure_cache.clear_failure(epic_number, state_code)
+                    
+                    if result["status"] == "success":
+                        successful += 1
+                        seen_epics[epic_number] = result["voter_id"]
+                        logs.add(epic_number, "success", attempts=result["attempts"], voter_id=result["voter_id"])
+                    elif result["status"] == "duplicate":
+                        # Inserted by another job after the pre-check ran
+                        duplicates += 1
+                        seen_epics[epic_number] = result["voter_id"]
+                        logs.add(epic_number, "duplicate", attempts=result["attempts"], voter_id=result["voter_id"])
+                    else:
+                        failed += 1
+                        failed_epics.append({"epic": epic_number, "reason": result["message"]})
+                        logs.add(epic_number, "failed", attempts=result.get("attempts", 1), error_message=result["message"])
+                    
+                    # Small delay to avoid overwhelming the API
+                    await asyncio.sleep(0.5)
+                
+            except Exception as e:
+                failed += 1
+                failed_epics.append({"epic": epic_number, "reason": str(e)})
+                logs.add(epic_number, "failed", error_message=str(e))
             
-            # Small delay to avoid overwhelming the API
-            await asyncio.sleep(0.5)
+            processed += 1
             
-        except Exception as e:
-            failed += 1
-            failed_epics.append({"epic": epic_number, "reason": str(e)})
+            # Update progress (coalesced - see JobProgressReporter); the leading duplicates go out in one
+            # write, and the last record is written with the completion
+            due = progress.record(processed, successful, failed, duplicates)
+            if processed <= duplicates_end:
+                due = processed == duplicates_end
+            # The checkpoint only moves once the logs of the records it covers are stored
+            if due and processed < len(epic_numbers) and await logs.flush():
+                if not await progress.write(input_update):
+                    # Cancelled through the API (possibly on another worker)
+                    stopped = "cancelled"
+                    break
+                input_update = {}
+        
+        if stopped:
+            # Keep the checkpoint exact so a later resume starts right after the last handled EPIC
+            if await logs.flush():
+                await progress.write(input_update, only_if_running=False)
+        elif not await logs.flush():
+            # Completing would lose these logs; the job stays in_progress and is resumed from its checkpoint
+            raise RuntimeError("Extraction logs could not be stored")
     
-    # Update job as completed
-    supabase.table("extraction_jobs").update({
+    elapsed = time.monotonic() - run_started
+    if processed > start and elapsed > 0:
+        JOB_THROUGHPUT.observe((processed - start) / elapsed)
+    
+    if stopped:
+        job_events.publish(job_id, JOB_FINISHED_EVENT, dict(progress.event(), status=stopped))
+        return
+    
+    # Update job as completed, with exact final counters
+    await progress.write({
+        **input_update,
         "status": "completed",
         "completed_at": datetime.now().isoformat(),
         "failed_epics": failed_epics
-    }).eq("id", job_id).execute()
+    })
+    
+    job_events.publish(job_id, JOB_FINISHED_EVENT, dict(progress.event(), status="completed"))
+    invalidate_analytics()
+
+startup_timer.mark("app setup")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,240 @@
+"""
+Prometheus metrics
+Minimal thread-safe counters, gauges and histograms rendered in the Prometheus text format, plus the API's metric definitions
+"""
+
+import time
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from single DB round-trips up to full ECI extractions with retries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Base class: a named metric family with a fixed set of label names"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of this family in the text exposition format"""
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values over cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: bucket counts (non-cumulative), sum, count
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * len(self.buckets), [0.0, 0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            totals[0] += value
+            totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the with block (also for blocks that await)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, (total, count)) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together at /metrics"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Content type of the Prometheus text exposition format (Starlette appends the charset)
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+# Metrics of this API (per worker process)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+VOTER_STAGE_SECONDS = Histogram(
+    "voter_stage_duration_seconds",
+    "Latency of each per-voter pipeline stage (duplicate_check, eci_extract, parse, insert, log_insert, progress_update)",
+    ["stage"]
+)
+
+SUPABASE_CALLS = Counter(
+    "supabase_calls_total", "Supabase (PostgREST) calls by table or RPC, operation and outcome",
+    ["table", "operation", "outcome"]
+)
+
+SUPABASE_CALL_SECONDS = Histogram(
+    "supabase_call_duration_seconds", "Supabase (PostgREST) call latency by table or RPC and operation",
+    ["table", "operation"]
+)
+
+EXTRACTION_ATTEMPTS = Histogram(
+    "eci_extraction_attempts", "ECI portal attempts (captcha retries) needed per EPIC, by result",
+    ["result"], buckets=(1, 2, 3, 4, 5, 10)
+)
+
+EXTRACTIONS_COALESCED = Counter(
+    "eci_extractions_coalesced_total", "EPIC extractions that joined an identical one already in flight instead of calling the ECI portal"
+)
+EXTRACTIONS_COALESCED.inc(0)
+
+JOB_RECORDS = Counter(
+    "extraction_job_records_total", "EPICs processed by extraction jobs, by outcome (rate() gives records/sec)",
+    ["status"]
+)
+
+JOB_THROUGHPUT = Histogram(
+    "extraction_job_throughput_records_per_second", "Records per second of each finished extraction job run",
+    [], buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 1000)
+)
+
+JOBS_RUNNING = Gauge(
+    "extraction_jobs_running", "Extraction jobs currently running in this worker"
+)
+JOBS_RUNNING.set(0)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP_REQUEST_SECONDS for every HTTP request (streams until their last byte)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = ["500"]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; label by its template, not the raw path
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=route, status=status[0])
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text format"""
+    return REGISTRY.render()
@@ -0,0 +1,4 @@
+-- Time of the last coalesced progress write for an extraction job.
+-- Exposed as last_progress_at by GET /api/jobs/{job_id}.
+ALTER TABLE extraction_jobs
+    ADD COLUMN IF NOT EXISTS progress_updated_at TIMESTAMPTZ;
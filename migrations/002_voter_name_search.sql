@@ -0,0 +1,49 @@
+-- Indexed, ranked name search for GET /api/voters/search?query=
+-- Trigram GIN indexes let the leading-wildcard ILIKE and similarity (%) matches
+-- use an index on full_name, full_name_l1 (Hindi script) and relative_full_name.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS voters_full_name_trgm_idx
+    ON voters USING gin (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS voters_full_name_l1_trgm_idx
+    ON voters USING gin (full_name_l1 gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS voters_relative_full_name_trgm_idx
+    ON voters USING gin (relative_full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS voters_ac_part_idx
+    ON voters (ac_number, part_number);
+
+-- Returns matching voter ids with a relevance score, best matches first.
+-- Matches on the voter's own name outrank matches on the relative's name.
+CREATE OR REPLACE FUNCTION search_voters_ranked(
+    p_query text,
+    p_part_number voters.part_number%TYPE DEFAULT NULL,
+    p_ac_number voters.ac_number%TYPE DEFAULT NULL,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0
+)
+RETURNS TABLE (voter_id voters.id%TYPE, search_rank real)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT v.id,
+           GREATEST(
+               similarity(coalesce(v.full_name, ''), q.term),
+               similarity(coalesce(v.full_name_l1, ''), q.term),
+               similarity(coalesce(v.relative_full_name, ''), q.term) * 0.5
+           )::real AS search_rank
+    FROM voters v
+    CROSS JOIN (
+        SELECT p_query AS term,
+               '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+    ) q
+    WHERE (v.full_name ILIKE q.pattern
+           OR v.full_name_l1 ILIKE q.pattern
+           OR v.relative_full_name ILIKE q.pattern
+           OR v.full_name % q.term
+           OR v.full_name_l1 % q.term)
+      AND (p_part_number IS NULL OR v.part_number = p_part_number)
+      AND (p_ac_number IS NULL OR v.ac_number = p_ac_number)
+    ORDER BY search_rank DESC, v.id
+    LIMIT p_limit
+    OFFSET p_offset;
+$$;
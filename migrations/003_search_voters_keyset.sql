@@ -0,0 +1,59 @@
+-- Keyset pagination for search_voters_ranked: callers pass the (search_rank, voter_id)
+-- of the last row they received instead of an ever-growing offset.
+-- The argument list changes, so drop the previous version rather than adding an overload.
+DO $$
+DECLARE
+    fn regprocedure;
+BEGIN
+    FOR fn IN SELECT oid::regprocedure FROM pg_proc WHERE proname = 'search_voters_ranked' LOOP
+        EXECUTE 'DROP FUNCTION ' || fn;
+    END LOOP;
+END $$;
+
+CREATE OR REPLACE FUNCTION search_voters_ranked(
+    p_query text,
+    p_part_number voters.part_number%TYPE DEFAULT NULL,
+    p_ac_number voters.ac_number%TYPE DEFAULT NULL,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0,
+    p_after_rank real DEFAULT NULL,
+    p_after_id voters.id%TYPE DEFAULT NULL
+)
+RETURNS TABLE (voter_id voters.id%TYPE, search_rank real)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT ranked.id, ranked.search_rank
+    FROM (
+        SELECT v.id,
+               GREATEST(
+                   similarity(coalesce(v.full_name, ''), q.term),
+                   similarity(coalesce(v.full_name_l1, ''), q.term),
+                   similarity(coalesce(v.relative_full_name, ''), q.term) * 0.5
+               )::real AS search_rank
+        FROM voters v
+        CROSS JOIN (
+            SELECT p_query AS term,
+                   '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+        ) q
+        WHERE (v.full_name ILIKE q.pattern
+               OR v.full_name_l1 ILIKE q.pattern
+               OR v.relative_full_name ILIKE q.pattern
+               OR v.full_name % q.term
+               OR v.full_name_l1 % q.term)
+          AND (p_part_number IS NULL OR v.part_number = p_part_number)
+          AND (p_ac_number IS NULL OR v.ac_number = p_ac_number)
+    ) ranked
+    WHERE p_after_rank IS NULL
+       OR ranked.search_rank < p_after_rank
+       OR (ranked.search_rank = p_after_rank AND ranked.id > p_after_id)
+    ORDER BY ranked.search_rank DESC, ranked.id
+    LIMIT p_limit
+    OFFSET p_offset;
+$$;
+
+-- Stable (created_at, id) ordering for cursor pagination of voters and jobs
+CREATE INDEX IF NOT EXISTS voters_created_at_id_idx
+    ON voters (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS extraction_jobs_created_at_id_idx
+    ON extraction_jobs (created_at DESC, id DESC);
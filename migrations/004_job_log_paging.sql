@@ -0,0 +1,19 @@
+-- Lean, paginated GET /api/jobs/{job_id}/logs
+-- Cursor pages walk (created_at, id) within a job; the status filter and the
+-- per-status counts use (job_id, status).
+CREATE INDEX IF NOT EXISTS extraction_logs_job_created_idx
+    ON extraction_logs (job_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS extraction_logs_job_status_idx
+    ON extraction_logs (job_id, status);
+
+-- Per-status log counts for a job in one grouped query
+CREATE OR REPLACE FUNCTION job_log_status_counts(p_job_id extraction_logs.job_id%TYPE)
+RETURNS TABLE (status extraction_logs.status%TYPE, count bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT l.status, count(*)
+    FROM extraction_logs l
+    WHERE l.job_id = p_job_id
+    GROUP BY l.status;
+$$;
@@ -0,0 +1,40 @@
+-- Compact raw_response (RAW_RESPONSE_MODE=extras, the new default).
+-- Rows written so far hold the whole ECI payload even though every mapped key
+-- is already stored in its own column. Keep only the unmapped keys and record
+-- the mode in extraction_metadata.raw_response_mode.
+-- The key list mirrors voter_records.ECI_FIELD_MAP.
+UPDATE voters
+SET raw_response = NULLIF(raw_response - ARRAY[
+        'epicId', 'epicNumber', 'formReferenceNo', 'applicantFirstName',
+        'applicantFirstNameL1', 'applicantFirstNameL2', 'applicantLastName',
+        'applicantLastNameL1', 'applicantLastNameL2', 'fullName', 'fullNameL1', 'age',
+        'gender', 'genderL1', 'birthYear', 'relationType', 'relationTypeL1', 'relationName',
+        'relationNameL1', 'relationNameL2', 'relationLName', 'relationLNameL1',
+        'relativeFullName', 'relativeFullNameL1', 'partNumber', 'partId', 'partName',
+        'partNameL1', 'partSerialNumber', 'sectionNo', 'asmblyName', 'asmblyNameL1', 'acId',
+        'acNumber', 'prlmntName', 'prlmntNameL1', 'prlmntNo', 'districtValue',
+        'districtValueL1', 'districtCd', 'districtId', 'districtNo', 'stateName',
+        'stateNameL1', 'stateId', 'stateCd', 'psbuildingName', 'psBuildingNameL1',
+        'psRoomDetails', 'psRoomDetailsL1', 'buildingAddress', 'buildingAddressL1',
+        'partLatLong', 'disabilityAny', 'disabilityType', 'isLocomotorDisabled',
+        'isSpeechHearingDisabled', 'isVisuallyImpaired', 'otherDisability',
+        'isWheelchairRequired', 'pwd', 'pwdMarkingFormType', 'pwdMarkingRefNo', 'formType',
+        'processType', 'statusType', 'revisionId', 'createdDttm', 'modifiedDttm',
+        'epicDatetime', 'isActive', 'isDeleted', 'isValidated', 'isVip', 'isForm8Migration'
+    ]::text[], '{}'::jsonb),
+    extraction_metadata = COALESCE(extraction_metadata, '{}'::jsonb) || '{"raw_response_mode": "extras"}'::jsonb
+WHERE raw_response IS NOT NULL
+  AND NOT COALESCE(extraction_metadata ? 'raw_response_mode', false);
+
+-- Whatever is left of the payload is compressed with lz4 when TOASTed
+-- (PostgreSQL 14+ built with lz4; otherwise the default pglz is kept).
+DO $$
+BEGIN
+    ALTER TABLE voters ALTER COLUMN raw_response SET COMPRESSION lz4;
+EXCEPTION WHEN feature_not_supported THEN
+    RAISE NOTICE 'lz4 not available, keeping default compression for voters.raw_response';
+END
+$$;
+
+-- The UPDATE leaves the old row versions behind; run VACUUM (FULL) voters
+-- in a maintenance window to return the space.
@@ -0,0 +1,27 @@
+-- Unique epic_number so voters can be saved with INSERT ... ON CONFLICT (epic_number)
+-- in a single round-trip (save_voter_to_db / save_voters_to_db).
+
+-- Merge duplicates written before the constraint existed: keep the oldest row
+-- per EPIC and point extraction logs of the others at it.
+CREATE TEMP TABLE voter_duplicates AS
+SELECT id, keep_id
+FROM (
+    SELECT id, first_value(id) OVER (PARTITION BY epic_number ORDER BY created_at, id) AS keep_id
+    FROM voters
+    WHERE epic_number IS NOT NULL
+) ranked
+WHERE id <> keep_id;
+
+UPDATE extraction_logs l
+SET voter_id = d.keep_id
+FROM voter_duplicates d
+WHERE l.voter_id = d.id;
+
+DELETE FROM voters v
+USING voter_duplicates d
+WHERE v.id = d.id;
+
+DROP TABLE voter_duplicates;
+
+CREATE UNIQUE INDEX IF NOT EXISTS voters_epic_number_key
+    ON voters (epic_number);
@@ -0,0 +1,11 @@
+-- Durable extraction jobs: the input list and state code are stored with the
+-- job so an interrupted job can be resumed from processed_records (its
+-- checkpoint) after a redeploy or crash.
+ALTER TABLE extraction_jobs
+    ADD COLUMN IF NOT EXISTS input_epics JSONB,
+    ADD COLUMN IF NOT EXISTS state_code TEXT;
+
+-- The recovery scan looks for unfinished jobs whose progress went stale
+CREATE INDEX IF NOT EXISTS extraction_jobs_unfinished_idx
+    ON extraction_jobs (progress_updated_at)
+    WHERE status IN ('pending', 'in_progress');
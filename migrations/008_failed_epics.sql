@@ -0,0 +1,73 @@
+-- Negative cache of EPICs the ECI portal failed to return after every attempt.
+-- Bulk jobs and /api/extract/single skip an EPIC until retry_after (unless
+-- forced); each further failure pushes retry_after out exponentially.
+CREATE TABLE IF NOT EXISTS failed_epics (
+    epic_number TEXT NOT NULL,
+    state_code TEXT NOT NULL,
+    failure_count INTEGER NOT NULL DEFAULT 1,
+    last_reason TEXT,
+    last_attempts INTEGER,
+    first_failed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_failed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    retry_after TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (epic_number, state_code)
+);
+
+-- Jobs remember whether they were submitted with force=true, so a resumed job keeps ignoring the cache
+ALTER TABLE extraction_jobs
+    ADD COLUMN IF NOT EXISTS force_retry BOOLEAN NOT NULL DEFAULT false;
+
+-- Record a failure in one round-trip. The wait is p_ttl_seconds after the
+-- first failure and grows by p_backoff_factor per failure, capped at
+-- p_max_ttl_seconds. An EPIC that has not failed for longer than the cap
+-- starts over at the first step.
+CREATE OR REPLACE FUNCTION record_epic_failure(
+    p_epic_number text,
+    p_state_code text,
+    p_reason text,
+    p_attempts integer,
+    p_ttl_seconds double precision,
+    p_backoff_factor double precision,
+    p_max_ttl_seconds double precision
+)
+RETURNS failed_epics
+LANGUAGE sql
+AS $$
+    INSERT INTO failed_epics AS f (epic_number, state_code, last_reason, last_attempts, retry_after)
+    VALUES (p_epic_number, p_state_code, p_reason, p_attempts,
+            now() + make_interval(secs => LEAST(p_ttl_seconds, p_max_ttl_seconds)))
+    ON CONFLICT (epic_number, state_code) DO UPDATE SET
+        failure_count = CASE
+            WHEN f.last_failed_at < now() - make_interval(secs => p_max_ttl_seconds) THEN 1
+            ELSE f.failure_count + 1
+        END,
+        last_reason = EXCLUDED.last_reason,
+        last_attempts = EXCLUDED.last_attempts,
+        last_failed_at = now(),
+        retry_after = now() + make_interval(secs => LEAST(
+            p_ttl_seconds * power(p_backoff_factor, CASE
+                WHEN f.last_failed_at < now() - make_interval(secs => p_max_ttl_seconds) THEN 0
+                ELSE f.failure_count
+            END),
+            p_max_ttl_seconds
+        ))
+    RETURNING f.*;
+$$;
+
+-- Failures of a batch of EPICs; active is false once the backoff has expired
+CREATE OR REPLACE FUNCTION find_epic_failures(p_state_code text, p_epic_numbers text[])
+RETURNS TABLE (
+    epic_number text,
+    failure_count integer,
+    last_reason text,
+    retry_after timestamptz,
+    active boolean
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT f.epic_number, f.failure_count, f.last_reason, f.retry_after, f.retry_after > now()
+    FROM failed_epics f
+    WHERE f.state_code = p_state_code
+      AND f.epic_number = ANY (p_epic_numbers);
+$$;
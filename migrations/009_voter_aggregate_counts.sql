@@ -0,0 +1,67 @@
+-- Voter aggregate reconciliation in one grouped query instead of paging every
+-- voters row through PostgREST. Buckets match aggregates.AggregateCounts:
+-- missing gender / part / AC values are 'unknown', ages outside a numeric
+-- value are 'unknown', and a disability flag is set for true/Y/YES/1.
+-- counted_at is the statement's snapshot time, so the caller can tell which
+-- rows it stored during the call were not counted.
+CREATE OR REPLACE FUNCTION voter_aggregate_counts()
+RETURNS TABLE (dimension text, bucket text, count bigint, counted_at timestamptz)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH v AS MATERIALIZED (
+        SELECT
+            coalesce(nullif(gender::text, ''), 'unknown') AS gender,
+            CASE
+                WHEN age::text !~ '^\s*-?[0-9]+\s*$' OR age IS NULL THEN 'unknown'
+                WHEN trim(age::text)::integer <= 25 THEN '18-25'
+                WHEN trim(age::text)::integer <= 35 THEN '26-35'
+                WHEN trim(age::text)::integer <= 45 THEN '36-45'
+                WHEN trim(age::text)::integer <= 60 THEN '46-60'
+                ELSE '60+'
+            END AS age_band,
+            coalesce(nullif(nullif(part_number::text, ''), '0'), 'unknown') AS part_number,
+            coalesce(nullif(nullif(ac_number::text, ''), '0'), 'unknown') AS ac_number,
+            upper(trim(disability_any::text)) IN ('T', 'Y', 'YES', 'TRUE', '1') AS disability_any,
+            upper(trim(is_locomotor_disabled::text)) IN ('T', 'Y', 'YES', 'TRUE', '1') AS is_locomotor_disabled,
+            upper(trim(is_speech_hearing_disabled::text)) IN ('T', 'Y', 'YES', 'TRUE', '1') AS is_speech_hearing_disabled,
+            upper(trim(is_visually_impaired::text)) IN ('T', 'Y', 'YES', 'TRUE', '1') AS is_visually_impaired,
+            upper(trim(is_wheelchair_required::text)) IN ('T', 'Y', 'YES', 'TRUE', '1') AS is_wheelchair_required,
+            upper(trim(pwd::text)) IN ('T', 'Y', 'YES', 'TRUE', '1') AS pwd
+        FROM voters
+    )
+    SELECT
+        CASE
+            WHEN grouping(gender) = 0 THEN 'gender'
+            WHEN grouping(age_band) = 0 THEN 'age_band'
+            WHEN grouping(part_number) = 0 THEN 'part_number'
+            WHEN grouping(ac_number) = 0 THEN 'ac_number'
+            ELSE 'total'
+        END,
+        coalesce(gender, age_band, part_number, ac_number),
+        count(*),
+        now()
+    FROM v
+    GROUP BY GROUPING SETS ((gender), (age_band), (part_number), (ac_number), ())
+    UNION ALL
+    SELECT 'disability', d.flag, d.count, now()
+    FROM (
+        SELECT
+            count(*) FILTER (WHERE disability_any) AS disability_any,
+            count(*) FILTER (WHERE is_locomotor_disabled) AS is_locomotor_disabled,
+            count(*) FILTER (WHERE is_speech_hearing_disabled) AS is_speech_hearing_disabled,
+            count(*) FILTER (WHERE is_visually_impaired) AS is_visually_impaired,
+            count(*) FILTER (WHERE is_wheelchair_required) AS is_wheelchair_required,
+            count(*) FILTER (WHERE pwd) AS pwd
+        FROM v
+    ) f
+    CROSS JOIN LATERAL (VALUES
+        ('disability_any', f.disability_any),
+        ('is_locomotor_disabled', f.is_locomotor_disabled),
+        ('is_speech_hearing_disabled', f.is_speech_hearing_disabled),
+        ('is_visually_impaired', f.is_visually_impaired),
+        ('is_wheelchair_required', f.is_wheelchair_required),
+        ('pwd', f.pwd)
+    ) AS d(flag, count)
+    WHERE d.count > 0;
+$$;
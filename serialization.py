@@ -0,0 +1,165 @@
+"""
+Response serialization
+Fast JSON rendering, columnar voter listings and Accept-Encoding negotiated gzip/brotli compression
+"""
+
+import os
+import json
+import gzip
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+# orjson and brotli are in requirements.txt; without them responses fall back to the json module and gzip only
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (the headers would outweigh the saving)
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+
+# Bodies at least this large are compressed in a worker thread instead of on the event loop
+RESPONSE_COMPRESSION_THREAD_BYTES = int(os.getenv("RESPONSE_COMPRESSION_THREAD_BYTES", "262144"))
+
+# Fast settings: voter JSON is highly repetitive, so higher levels buy little for their CPU cost
+GZIP_COMPRESSION_LEVEL = int(os.getenv("GZIP_COMPRESSION_LEVEL", "5"))
+BROTLI_COMPRESSION_QUALITY = int(os.getenv("BROTLI_COMPRESSION_QUALITY", "4"))
+
+# Response formats of voter listings (?format=)
+LISTING_FORMATS = ("rows", "columnar")
+
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "text/plain", "text/html", "text/csv")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize JSON-native content (PostgREST rows, dicts, lists) to compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when it is installed
+
+    Endpoints returning large listings return this directly, which also skips
+    FastAPI's jsonable_encoder pass over every row.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def to_columnar(rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """One array per field instead of one object per row (fields missing from a row are null)"""
+    columns: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    return {column: [row.get(column) for row in rows] for column in columns}
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header (highest q wins, br on ties), or None"""
+    accepted = _accepted_encodings(accept_encoding)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    best, best_quality = None, 0.0
+    for encoding in supported:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_COMPRESSION_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_COMPRESSION_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses with the client's preferred encoding
+
+    Only single-message bodies are compressed; streamed responses (SSE,
+    exports) pass through untouched so nothing is buffered or delayed.
+    """
+
+    def __init__(self, app, minimum_size: int = RESPONSE_COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        pending_start = []
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    # Never hold back the headers of an event stream
+                    await send(message)
+                else:
+                    pending_start.append(message)
+                return
+
+            if message["type"] != "http.response.body" or not pending_start:
+                await send(message)
+                return
+
+            start = pending_start.pop()
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+
+            if (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_CONTENT_TYPES)
+            ):
+                if len(body) >= RESPONSE_COMPRESSION_THREAD_BYTES:
+                    body = await asyncio.get_running_loop().run_in_executor(None, compress, body, encoding)
+                else:
+                    body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = dict(message, body=body)
+
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
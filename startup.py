@@ -0,0 +1,33 @@
+"""
+Startup timing
+Wall-clock breakdown of API startup phases, logged once the server is ready
+"""
+
+import time
+from typing import List, Tuple
+
+
+class StartupTimer:
+    """Durations of named startup phases, each measured from the previous mark"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        """Close the phase that ends now"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self) -> float:
+        return self.last - self.started
+
+    def report(self) -> str:
+        breakdown = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.phases)
+        return f"{breakdown} (total {self.total():.2f}s)"
+
+
+# Created on first import, so main.py imports this module before anything heavy
+startup_timer = StartupTimer()
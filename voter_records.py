@@ -0,0 +1,161 @@
+"""
+Voter record mapping
+Declarative ECI field → voters column table, compiled once at import, and compact storage of the raw payload
+"""
+
+import os
+import json
+import zlib
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# How the ECI payload is kept in raw_response:
+#   extras     - only the keys not already mapped to a column (default)
+#   compressed - the full payload, zlib-compressed and base64-encoded
+#   full       - the full payload as is (previous behaviour, roughly doubles row size)
+#   none       - not stored
+RAW_RESPONSE_MODE = os.getenv("RAW_RESPONSE_MODE", "extras").strip().lower()
+RAW_RESPONSE_MODES = ("extras", "compressed", "full", "none")
+
+if RAW_RESPONSE_MODE not in RAW_RESPONSE_MODES:
+    raise ValueError(f"RAW_RESPONSE_MODE must be one of: {', '.join(RAW_RESPONSE_MODES)}")
+
+# voters column, ECI key, default when the key is missing
+ECI_FIELD_MAP: List[Tuple[str, str, Any]] = [
+    ("epic_id", "epicId", None),
+    ("epic_number", "epicNumber", None),
+    ("form_reference_no", "formReferenceNo", None),
+
+    # Personal Information
+    ("applicant_first_name", "applicantFirstName", None),
+    ("applicant_first_name_l1", "applicantFirstNameL1", None),
+    ("applicant_first_name_l2", "applicantFirstNameL2", None),
+    ("applicant_last_name", "applicantLastName", None),
+    ("applicant_last_name_l1", "applicantLastNameL1", None),
+    ("applicant_last_name_l2", "applicantLastNameL2", None),
+    ("full_name", "fullName", None),
+    ("full_name_l1", "fullNameL1", None),
+
+    # Demographics
+    ("age", "age", None),
+    ("gender", "gender", None),
+    ("gender_l1", "genderL1", None),
+    ("birth_year", "birthYear", None),
+
+    # Relation Information
+    ("relation_type", "relationType", None),
+    ("relation_type_l1", "relationTypeL1", None),
+    ("relation_name", "relationName", None),
+    ("relation_name_l1", "relationNameL1", None),
+    ("relation_name_l2", "relationNameL2", None),
+    ("relation_lname", "relationLName", None),
+    ("relation_lname_l1", "relationLNameL1", None),
+    ("relative_full_name", "relativeFullName", None),
+    ("relative_full_name_l1", "relativeFullNameL1", None),
+
+    # Location Information
+    ("part_number", "partNumber", None),
+    ("part_id", "partId", None),
+    ("part_name", "partName", None),
+    ("part_name_l1", "partNameL1", None),
+    ("part_serial_number", "partSerialNumber", None),
+    ("section_no", "sectionNo", None),
+
+    # Assembly/Parliamentary Details
+    ("asmbly_name", "asmblyName", None),
+    ("asmbly_name_l1", "asmblyNameL1", None),
+    ("ac_id", "acId", None),
+    ("ac_number", "acNumber", None),
+    ("prlmnt_name", "prlmntName", None),
+    ("prlmnt_name_l1", "prlmntNameL1", None),
+    ("prlmnt_no", "prlmntNo", None),
+
+    # District/State
+    ("district_value", "districtValue", None),
+    ("district_value_l1", "districtValueL1", None),
+    ("district_cd", "districtCd", None),
+    ("district_id", "districtId", None),
+    ("district_no", "districtNo", None),
+    ("state_name", "stateName", None),
+    ("state_name_l1", "stateNameL1", None),
+    ("state_id", "stateId", None),
+    ("state_cd", "stateCd", None),
+
+    # Polling Station Details
+    ("ps_building_name", "psbuildingName", None),
+    ("ps_building_name_l1", "psBuildingNameL1", None),
+    ("ps_room_details", "psRoomDetails", None),
+    ("ps_room_details_l1", "psRoomDetailsL1", None),
+    ("building_address", "buildingAddress", None),
+    ("building_address_l1", "buildingAddressL1", None),
+    ("part_lat_long", "partLatLong", None),
+
+    # Disability Information
+    ("disability_any", "disabilityAny", None),
+    ("disability_type", "disabilityType", None),
+    ("is_locomotor_disabled", "isLocomotorDisabled", None),
+    ("is_speech_hearing_disabled", "isSpeechHearingDisabled", None),
+    ("is_visually_impaired", "isVisuallyImpaired", None),
+    ("other_disability", "otherDisability", None),
+    ("is_wheelchair_required", "isWheelchairRequired", None),
+    ("pwd", "pwd", None),
+    ("pwd_marking_form_type", "pwdMarkingFormType", None),
+    ("pwd_marking_ref_no", "pwdMarkingRefNo", None),
+
+    # Form/Process Information
+    ("form_type", "formType", None),
+    ("process_type", "processType", None),
+    ("status_type", "statusType", None),
+    ("revision_id", "revisionId", None),
+
+    # Timestamps
+    ("created_dttm", "createdDttm", None),
+    ("modified_dttm", "modifiedDttm", None),
+    ("epic_datetime", "epicDatetime", None),
+
+    # Flags
+    ("is_active", "isActive", True),
+    ("is_deleted", "isDeleted", False),
+    ("is_validated", "isValidated", None),
+    ("is_vip", "isVip", None),
+    ("is_form8_migration", "isForm8Migration", None)
+]
+
+# Compiled once: the mapping as a tuple of specs plus lookups derived from it
+_FIELD_SPECS: Tuple[Tuple[str, str, Any], ...] = tuple(ECI_FIELD_MAP)
+MAPPED_ECI_KEYS = frozenset(key for _, key, _ in _FIELD_SPECS)
+
+# Every column written by parse_eci_response, in table order
+VOTER_RECORD_COLUMNS: List[str] = [column for column, _, _ in _FIELD_SPECS] + ["raw_response", "extraction_metadata"]
+
+
+def compress_payload(payload: Dict[str, Any]) -> Dict[str, str]:
+    """zlib-compress a JSON payload into a JSON-storable object"""
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return {"zlib": base64.b64encode(zlib.compress(data, 9)).decode("ascii")}
+
+
+def compact_raw_response(response_data: Dict[str, Any], mode: str = RAW_RESPONSE_MODE) -> Optional[Any]:
+    """The raw_response value for a payload under the given storage mode"""
+    if mode == "extras":
+        extras = {key: value for key, value in response_data.items() if key not in MAPPED_ECI_KEYS}
+        return extras or None
+    if mode == "compressed":
+        return compress_payload(response_data)
+    if mode == "full":
+        return response_data
+    return None
+
+
+def parse_eci_response(response_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse and structure ECI API response"""
+    record = {column: response_data.get(key, default) for column, key, default in _FIELD_SPECS}
+    record["raw_response"] = compact_raw_response(response_data)
+    record["extraction_metadata"] = {
+        "extracted_at": datetime.now().isoformat(),
+        "api_version": "1.0",
+        "raw_response_mode": RAW_RESPONSE_MODE
+    }
+    return record
+